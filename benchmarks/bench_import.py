@@ -0,0 +1,54 @@
+"""
+Import-time benchmark of `pydbsmgr`. Each measurement runs a fresh interpreter, so the
+numbers include the cost of every dependency pulled in by the import.
+
+Usage: python -m benchmarks.bench_import [module] [repeat] [max_ms]
+
+With `max_ms` the script exits with status 1 when the best time exceeds it, or when any
+of the heavy optional dependencies is imported eagerly.
+"""
+
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+# pyarrow is left out: pandas itself imports it when it is installed
+HEAVY_MODULES = ("azure", "IPython", "psutil", "yaml", "dotenv")
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module: str = "pydbsmgr") -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    module = sys.argv[1] if len(sys.argv) > 1 else "pydbsmgr"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_ms = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    results = [measure(module) for _ in range(repeat)]
+    times = [result["seconds"] for result in results]
+    heavy = results[-1]["heavy"]
+    print(
+        f"import {module:<30} best {min(times) * 1e3:10.3f} ms   "
+        f"median {np.median(times) * 1e3:10.3f} ms"
+    )
+    print(f"heavy modules imported: {', '.join(heavy) or 'none'}")
+    if max_ms is not None and (min(times) * 1e3 > max_ms or heavy):
+        sys.exit(1)
@@ -0,0 +1,40 @@
+"""
+Benchmarks of the column helpers of `pydbsmgr.main` that sit on the hot path of
+`FrameCheck.fix` and `FrameCheck.generate_report(concat_vertically=True)`.
+
+Usage: python -m benchmarks.bench_main [rows] [columns]
+"""
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from pydbsmgr.main import drop_empty_columns, intersection_cols
+
+
+def make_frame(rows: int, columns: int, empty_frac: float = 0.1) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        rng.normal(size=(rows, columns)), columns=[f"col_{i}" for i in range(columns)]
+    )
+    df.iloc[:, : int(columns * empty_frac)] = np.nan
+    return df
+
+
+def bench(name: str, stmt, repeat: int = 5) -> None:
+    times = timeit.repeat(stmt, number=1, repeat=repeat)
+    print(f"{name:<40} best {min(times) * 1e3:10.3f} ms   median {np.median(times) * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    df = make_frame(rows, columns)
+    dfs = [df.iloc[:, i:] for i in range(10)]
+
+    print(f"rows={rows:,} columns={columns:,}")
+    bench("drop_empty_columns", lambda: drop_empty_columns(df))
+    bench("drop_empty_columns (no empty columns)", lambda: drop_empty_columns(df.iloc[:, 20:]))
+    bench("intersection_cols (10 frames)", lambda: intersection_cols(list(dfs)))
@@ -0,0 +1,53 @@
+"""
+Synthetic data generators for the benchmark suite.
+
+The frames mix the kinds of columns `pydbsmgr` is meant to clean: dirty strings with
+punctuation and emojis, dates written in several formats, numbers stored as text, and
+numeric columns with missing values. Every value is drawn from a small pool, so that even
+the 10 million rows frame is generated in a few seconds.
+"""
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+_WORDS = ["John", "alice", "BOB", "Ñandú", "José", "maría", "O'Brien", "Smith", "data", "Test"]
+_NOISE = ["", " ", "#", "$", "*", "!!", " \U0001F600", ".", "  ", "?"]
+
+
+def _pool(rng: np.random.Generator, size: int = 1000) -> dict:
+    words = rng.choice(_WORDS, size=(size, 2))
+    noise = rng.choice(_NOISE, size=(size, 2))
+    names = [f"{n1}{a} {b}{n2}" for (a, b), (n1, n2) in zip(words, noise)]
+    dates = pd.Timestamp("2000-01-01") + pd.to_timedelta(rng.integers(0, 9000, size), unit="D")
+    formats = rng.choice(["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"], size=size)
+    return {
+        "name": names,
+        "email": [f"{a.lower()}.{b.lower()}@example.com" for a, b in words],
+        "date": [date.strftime(fmt) for date, fmt in zip(dates, formats)],
+        "amount": [f"{value:.2f}" for value in rng.normal(1000, 250, size)],
+        "code": [str(value) for value in rng.integers(0, 100_000, size)],
+    }
+
+
+def make_dirty_frame(rows: int, seed: int = 0, missing_frac: float = 0.05) -> pd.DataFrame:
+    """Returns a `DataFrame` with `rows` rows of mixed dirty string, date and numeric columns."""
+    rng = np.random.default_rng(seed)
+    pool = _pool(rng)
+    data = {}
+    for col, values in pool.items():
+        column = np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+        column[rng.random(rows) < missing_frac] = None
+        data[col] = column
+    data["quantity"] = rng.integers(0, 1000, rows)
+    score = rng.normal(size=rows)
+    score[rng.random(rows) < missing_frac] = np.nan
+    data["score"] = score
+    data["flag"] = rng.random(rows) < 0.5
+    return pd.DataFrame(data)
+
+
+def make_frame(size: str, seed: int = 0) -> pd.DataFrame:
+    """Returns the dirty frame of one of the `SIZES` (`10k`, `1m` or `10m`)."""
+    return make_dirty_frame(SIZES[size], seed)
@@ -0,0 +1,206 @@
+"""
+Benchmark suite of the cleaning, profiling and upload hot paths.
+
+Usage:
+    python -m benchmarks.run [--size 10k|1m|10m] [--repeat 3] [--cases clean ...]
+                             [--save FILE] [--compare FILE] [--tolerance 0.25]
+
+`--save` stores the results as a baseline, `--compare` exits with status 1 when a case is
+slower than its baseline by more than `tolerance` (a fraction of the baseline best time), or
+when a selected case of the baseline failed or no longer exists. Cases skipped because an
+optional dependency is missing are reported only.
+Baselines are kept in `benchmarks/baselines/<size>.json`; they depend on the machine, so
+refresh them with `--save` before comparing on a different one.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.data import SIZES, make_frame
+from pydbsmgr.lightest import LightCleaner
+from pydbsmgr.main import check_dtypes, clean
+from pydbsmgr.utils.tools import ColumnsDtypes
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def case_clean(df: pd.DataFrame) -> Callable:
+    names = df["name"].dropna().to_list()
+    return lambda: [clean(name) for name in names]
+
+
+def case_check_dtypes(df: pd.DataFrame) -> Callable:
+    return lambda: check_dtypes(df.copy(), df.dtypes)
+
+
+def case_check_dtypes_categorical(df: pd.DataFrame) -> Callable:
+    return lambda: check_dtypes(df.copy(), df.dtypes, categorical=True)
+
+
+def case_light_cleaner(df: pd.DataFrame) -> Callable:
+    # `clean_frame` cannot clean missing strings, they are given as empty strings
+    strings = df.select_dtypes("object").columns
+    df = df.assign(**{col: df[col].fillna("") for col in strings})
+    return lambda: LightCleaner(df).clean_frame()
+
+
+def case_light_cleaner_categorical(df: pd.DataFrame) -> Callable:
+    return lambda: LightCleaner(df).clean_frame(categorical=True)
+
+
+def case_columns_dtypes(df: pd.DataFrame) -> Callable:
+    return lambda: ColumnsDtypes(df).correct()
+
+
+def case_generate_report(df: pd.DataFrame) -> Callable:
+    from pydbsmgr.health import FrameCheck
+
+    def run():
+        FrameCheck([df], ["benchmark"]).generate_report(
+            report_name="report.html", yaml_name="output.yaml", images=False
+        )
+
+    return run
+
+
+def case_prepare_insertion(df: pd.DataFrame) -> Callable:
+    from pydbsmgr.fast_upload import DataFrameToSQL
+
+    uploader = DataFrameToSQL.__new__(DataFrameToSQL)
+    prepared = uploader._preprocess_dataframe(df)
+    return lambda: uploader._prepare_data_for_insertion(prepared)
+
+
+def case_upload_sqlite(df: pd.DataFrame) -> Callable:
+    from benchmarks.sqlite_adapter import SQLiteUploader
+
+    def run():
+        uploader = SQLiteUploader()
+        uploader.execute(df, "benchmark", chunk_size=10, method="override")
+        assert uploader.count("benchmark") == len(df)
+
+    return run
+
+
+CASES: Dict[str, Callable[[pd.DataFrame], Callable]] = {
+    "clean": case_clean,
+    "check_dtypes": case_check_dtypes,
+    "check_dtypes (categorical)": case_check_dtypes_categorical,
+    "LightCleaner.clean_frame": case_light_cleaner,
+    "LightCleaner.clean_frame (categorical)": case_light_cleaner_categorical,
+    "ColumnsDtypes.correct": case_columns_dtypes,
+    "FrameCheck.generate_report": case_generate_report,
+    "DataFrameToSQL._prepare_data_for_insertion": case_prepare_insertion,
+    "UploadToSQL.execute (sqlite)": case_upload_sqlite,
+}
+
+
+def run_cases(size: str, cases: list, repeat: int) -> dict:
+    df = make_frame(size)
+    results, errors, skipped = {}, {}, {}
+    for name in cases:
+        try:
+            stmt = CASES[name](df)
+        except ImportError as e:
+            print(f"{name:<45} skipped: {e}")
+            skipped[name] = str(e)
+            continue
+        try:
+            # The functions print their progress, keep it out of the timings table
+            with contextlib.redirect_stdout(io.StringIO()):
+                times = timeit.repeat(stmt, number=1, repeat=repeat)
+        except Exception as e:
+            print(f"{name:<45} failed: {type(e).__name__}: {e}")
+            errors[name] = f"{type(e).__name__}: {e}"
+            continue
+        results[name] = {"best": min(times), "median": float(np.median(times))}
+        print(
+            f"{name:<45} best {min(times) * 1e3:12.3f} ms   "
+            f"median {np.median(times) * 1e3:12.3f} ms"
+        )
+    return {
+        "size": size,
+        "rows": SIZES[size],
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cases": list(cases),
+        "results": results,
+        "errors": errors,
+        "skipped": skipped,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """Prints the ratio to the baseline of every case, returns `False` on a regression or
+    when a selected case of the baseline failed or is missing."""
+    passed = True
+    for name, error in current["errors"].items():
+        print(f"{name:<45} FAILED: {error}")
+        passed = False
+    for name in baseline["results"]:
+        # Cases left out with `--cases` are not compared, cases removed from the suite are
+        if name in current["results"] or (name in CASES and name not in current["cases"]):
+            continue
+        if name in current["skipped"]:
+            print(f"{name:<45} skipped, not compared")
+        elif name not in current["errors"]:
+            print(f"{name:<45} MISSING from the results")
+            passed = False
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<45} no baseline")
+            continue
+        ratio = result["best"] / baseline["results"][name]["best"]
+        status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        passed &= status == "ok"
+        print(f"{name:<45} {ratio:6.2f}x baseline   {status}")
+    return passed
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--size", choices=list(SIZES), default="10k")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--save", help="Write the results to this baseline file.")
+    parser.add_argument("--compare", help="Compare the results with this baseline file.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    print(f"size={args.size} rows={SIZES[args.size]:,}")
+    # `generate_report` and `health` write their reports and logs in the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            current = run_cases(args.size, args.cases, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as file:
+            json.dump(current, file, indent=2)
+            file.write("\n")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare(current, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
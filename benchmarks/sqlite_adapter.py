@@ -0,0 +1,67 @@
+"""
+SQLite stand-in for the pyodbc connection used by `pydbsmgr.fast_upload`.
+
+The upload benchmarks exercise `UploadToSQL` end to end (preprocessing, query building,
+`executemany`) without a SQL Server instance, nor `pyodbc` and its ODBC driver: `sqlite3` is
+the DB-API module of the uploader.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from pydbsmgr.fast_upload import UploadToSQL
+
+sqlite3.register_adapter(pd.Timestamp, str)
+
+
+class SQLiteCursor:
+    """Cursor that accepts the `fast_executemany` attribute set by the uploader."""
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self._cursor = cursor
+        self.fast_executemany = False
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    """Connection with the `closed` attribute of pyodbc. Closing keeps the database alive, so
+    an in-memory database survives the reconnections of the uploader."""
+
+    def __init__(self, database: sqlite3.Connection) -> None:
+        self._database = database
+        self.closed = False
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._database.cursor())
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class SQLiteUploader(UploadToSQL):
+    """`UploadToSQL` writing to a SQLite database, `:memory:` by default."""
+
+    _driver = sqlite3
+
+    def __init__(self, database: str = ":memory:") -> None:
+        self._connection_string = database
+        self._database = sqlite3.connect(database, isolation_level=None)
+        self._verbose = False
+        self._reconnect()
+
+    def _reconnect(self):
+        self._con = SQLiteConnection(self._database)
+        self._cur = self._con.cursor()
+
+    def _check_table_exists(self, table_name: str) -> bool:
+        if self._con.closed:
+            self._reconnect()
+        query = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?"
+        self._cur.execute(query, (table_name,))
+        return bool(self._cur.fetchone()[0])
+
+    def count(self, table_name: str) -> int:
+        return self._database.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
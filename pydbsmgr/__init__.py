@@ -10,8 +10,96 @@ Main Modules:
 - pydbsmgr.utils.tools: Contains utility functions for data processing, normalization, and visualization.
 
 By importing the main modules directly or accessing them through this central entry point (i.e., from pydbsmgr import *), you can leverage the full range of pydbsmgr's capabilities to streamline your database management workflow.
+
+Only `pydbsmgr.main` is imported with the package. The names of `pydbsmgr.utils.azure_sdk` and
+`pydbsmgr.utils.tools` are loaded on first access (PEP 562), so the Azure SDK, pyarrow, psutil,
+yaml and dotenv are not imported by a plain `import pydbsmgr`.
 """
 
+import importlib
+
+from pydbsmgr import main as _main
 from pydbsmgr.main import *
-from pydbsmgr.utils.azure_sdk import *
-from pydbsmgr.utils.tools import *
+
+_AZURE_SDK = "pydbsmgr.utils.azure_sdk"
+_CONSOLIDATE = "pydbsmgr.consolidate"
+_TOOLS = "pydbsmgr.utils.tools"
+
+_LAZY_ATTRIBUTES = {
+    **dict.fromkeys(
+        [
+            "get_connection_string",
+            "parse_blob",
+            "StorageController",
+            "AsyncStorageController",
+        ],
+        _AZURE_SDK,
+    ),
+    **dict.fromkeys(["consolidate_workbooks", "find_workbooks"], _CONSOLIDATE),
+    **dict.fromkeys(
+        [
+            "disableprints",
+            "most_repeated_item",
+            "generate_secure_password",
+            "coerce_datetime",
+            "sql_column_name",
+            "ColumnsCheck",
+            "frame_to_rows",
+            "BlockBlobWriter",
+            "write_parquet_stream",
+            "HIVE_DEFAULT_PARTITION",
+            "get_partition_path",
+            "parse_partition_path",
+            "infer_partition_type",
+            "match_partition",
+            "ControllerFeatures",
+            "column_coincidence",
+            "table_from_frame",
+            "column_fingerprints",
+            "duplicated_columns",
+            "drop_duplicate_columns",
+            "duplicated_rows",
+            "drop_duplicate_rows",
+            "concat_frames",
+            "merge_by_coincidence",
+            "terminate_process",
+            "erase_files",
+            "get_extraction_date",
+            "ColumnsDtypes",
+            "numeric_ratio",
+            "to_nullable_numeric",
+            "downcast_series",
+            "downcast_frame",
+            "EXCEL_PARALLEL_MIN_BYTES",
+            "get_excel_engine",
+            "read_excel_sheet",
+            "read_excel_sheets",
+            "create_directory",
+            "create_directories_from_yaml",
+        ],
+        _TOOLS,
+    ),
+}
+
+__all__ = [name for name in vars(_main) if not name.startswith("_")] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name in _LAZY_ATTRIBUTES:
+        modules = [_LAZY_ATTRIBUTES[name]]
+    else:
+        # Any other name the former star imports exposed, `tools` took precedence
+        modules = [_TOOLS, _AZURE_SDK]
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        if hasattr(module, name):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,158 @@
+"""
+Consolidation of the sheets of many workbooks into a `.parquet` catalogue.
+
+Every sheet of every workbook found under a directory is written to its own `.parquet` file,
+without duplicated columns, and an `index.parquet` file describes where each one came from.
+Two columns are duplicates only when they hold the same values with the same data type, so an
+`int64` column and an equal `float64` column are both kept, while the former
+`df.T.drop_duplicates().T` treated them as duplicates.
+
+Usage: python -m pydbsmgr.consolidate <directory> [--output-dir DIR] [--extension .xlsx]
+                                      [--workers N] [--engine auto|calamine|openpyxl]
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import glob
+import os
+import sys
+from functools import partial
+from typing import List
+
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.core.frame import DataFrame
+
+from pydbsmgr.utils.tools import drop_duplicate_columns, read_excel_sheets, table_from_frame
+
+INDEX_FILE = "index.parquet"
+
+INDEX_COLUMNS = [
+    "rpt_name",
+    "name_xls",
+    "sheet_name",
+    "file_path",
+    "rows",
+    "columns",
+    "duplicate columns",
+    "error",
+]
+
+
+def find_workbooks(directory_path: str, extension: str = ".xlsx") -> List[str]:
+    """Returns the paths of the workbooks under `directory_path`, sorted."""
+    return sorted(glob.glob(os.path.join(directory_path, "**", f"*{extension}"), recursive=True))
+
+
+def consolidate_workbook(
+    path: str, file_index: int, directory_path: str, output_dir: str, engine: str = "auto"
+) -> List[dict]:
+    """Writes each sheet of a workbook to `<output_dir>/rpt_<file_index>_<sheet_index>.parquet`.
+
+    It runs in a worker process, only the index rows are sent back. A workbook that cannot
+    be read gets a single index row with the `error`.
+    """
+    name_xls = os.path.splitext(os.path.relpath(path, directory_path))[0].replace("\\", "/")
+    try:
+        sheets = read_excel_sheets(path, engine=engine, max_workers=1)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        return [
+            dict.fromkeys(INDEX_COLUMNS) | {"name_xls": name_xls, "file_path": path, "error": error}
+        ]
+
+    rows = []
+    for sheet_index, (sheet_name, df) in enumerate(sheets.items()):
+        rpt_name = f"rpt_{file_index}_{sheet_index}"
+        n_columns = df.shape[1]
+        df = drop_duplicate_columns(df)
+        pq.write_table(table_from_frame(df), os.path.join(output_dir, f"{rpt_name}.parquet"))
+        rows.append(
+            {
+                "rpt_name": rpt_name,
+                "name_xls": name_xls,
+                "sheet_name": sheet_name,
+                "file_path": path,
+                "rows": len(df),
+                "columns": df.shape[1],
+                "duplicate columns": n_columns - df.shape[1],
+                "error": None,
+            }
+        )
+    return rows
+
+
+def consolidate_workbooks(
+    directory_path: str,
+    output_dir: str = "Detail of the report",
+    extension: str = ".xlsx",
+    max_workers: int | None = None,
+    engine: str = "auto",
+) -> DataFrame:
+    """Consolidates the sheets of all the workbooks under a directory.
+
+    Parameters
+    ----------
+    directory_path : `str`
+        The directory searched recursively for workbooks.
+    output_dir : `str`, `optional`
+        The directory of the `.parquet` files and of the `index.parquet` file. Defaults to
+        `Detail of the report`.
+    extension : `str`, `optional`
+        The extension of the workbooks. Defaults to `.xlsx`.
+    max_workers : `int` | `None`, `optional`
+        Maximum number of worker processes, each one reads whole workbooks. `1` reads them
+        sequentially. Defaults to `None`, one per CPU.
+    engine : `str`, `optional`
+        `calamine`, `openpyxl` or `auto`, see `get_excel_engine`. Defaults to `auto`.
+
+    Returns
+    -------
+    `DataFrame`
+        The index, one row per sheet (or per workbook that could not be read).
+    """
+    paths = find_workbooks(directory_path, extension)
+    os.makedirs(output_dir, exist_ok=True)
+    consolidate = partial(
+        consolidate_workbook, directory_path=directory_path, output_dir=output_dir, engine=engine
+    )
+
+    if max_workers == 1 or len(paths) < 2:
+        results = list(map(consolidate, paths, range(len(paths))))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(consolidate, paths, range(len(paths))))
+
+    index = pd.DataFrame([row for rows in results for row in rows], columns=INDEX_COLUMNS)
+    index.to_parquet(os.path.join(output_dir, INDEX_FILE), index=False)
+    return index
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("directory", nargs="+", help="Directory of the workbooks.")
+    parser.add_argument("--output-dir", default="Detail of the report")
+    parser.add_argument("--extension", default=".xlsx")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--engine", default="auto", choices=["auto", "calamine", "openpyxl"])
+    args = parser.parse_args(argv)
+
+    # Paths with spaces may arrive unquoted as several arguments
+    directory_path = " ".join(args.directory)
+    print("Today date is: ", datetime.date.today())
+    print("You have selected the path :", directory_path)
+
+    index = consolidate_workbooks(
+        directory_path, args.output_dir, args.extension, args.workers, args.engine
+    )
+    errors = index["error"].notna()
+    print(f"Found files : {index['file_path'].nunique()}")
+    print(f"Sheets written : {(~errors).sum()} to {args.output_dir}")
+    for _, row in index[errors].iterrows():
+        print(f"UserWarning: Could not read {row['file_path']}. Error: {row['error']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
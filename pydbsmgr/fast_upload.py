@@ -2,10 +2,11 @@ import os
 
 import numpy as np
 import pandas as pd
-import pyodbc
 from pandas.core.frame import DataFrame
 
-from pydbsmgr.utils.tools import ColumnsCheck
+from pydbsmgr.utils.instrumentation import instrument, span
+from pydbsmgr.utils.profiling import profiled
+from pydbsmgr.utils.tools import ColumnsCheck, drop_duplicate_rows, frame_to_rows
 
 
 class DataFrameToSQL(ColumnsCheck):
@@ -13,9 +14,17 @@ class DataFrameToSQL(ColumnsCheck):
 
     def __init__(self, connection_string: str) -> None:
         self._connection_string = connection_string
-        self._con = pyodbc.connect(self._connection_string, autocommit=True)
+        self._con = self._driver.connect(self._connection_string, autocommit=True)
         self._cur = self._con.cursor()
 
+    @property
+    def _driver(self):
+        """The DB-API module of the connection. `pyodbc` is imported with the first connection,
+        it needs the ODBC driver manager, so the rest of the module can be used without it."""
+        import pyodbc
+
+        return pyodbc
+
     def import_table(
         self,
         df: DataFrame,
@@ -36,7 +45,7 @@ class DataFrameToSQL(ColumnsCheck):
         try:
             query = self._create_table_query(table_name, df, char_length, override_length)
             self._cur.execute(query)
-        except pyodbc.Error as e:
+        except self._driver.Error as e:
             if overwrite:
                 self._drop_and_recreate_table(table_name, query)
             else:
@@ -44,7 +53,8 @@ class DataFrameToSQL(ColumnsCheck):
 
         query = self._insert_table_query(table_name, df)
         self._cur.fast_executemany = True
-        self._cur.executemany(query, self._prepare_data_for_insertion(df))
+        with span("executemany", rows=len(df)):
+            self._cur.executemany(query, self._prepare_data_for_insertion(df))
 
         if close_connection:
             self._con.close()
@@ -65,8 +75,9 @@ class DataFrameToSQL(ColumnsCheck):
         try:
             query = self._insert_table_query(table_name, df)
             self._cur.fast_executemany = True
-            self._cur.executemany(query, self._prepare_data_for_insertion(df))
-        except pyodbc.Error as e:
+            with span("executemany", rows=len(df)):
+                self._cur.executemany(query, self._prepare_data_for_insertion(df))
+        except self._driver.Error as e:
             print(f"UserWarning: Could not upload data to table {table_name}. Error: {e}")
 
         if close_connection:
@@ -75,19 +86,39 @@ class DataFrameToSQL(ColumnsCheck):
         if verbose:
             print(f"Data successfully uploaded to table {table_name}!")
 
+    @instrument("DataFrameToSQL._preprocess_dataframe")
     def _preprocess_dataframe(self, df: DataFrame) -> DataFrame:
+        """Renames the columns and sets `None` for the missing values of text columns.
+
+        Only the object, string and category columns that contain missing values are
+        replaced, they become object columns, every other column keeps sharing its data with
+        `df`. `NaT` values of datetime columns are converted in `_prepare_data_for_insertion`,
+        so those columns keep their dtype.
+        """
         super().__init__(df)
-        return self.get_frame().replace([" ", "<NA>", np.datetime64("NaT")], None)
+        df = self._process_columns(surrounding=True, copy=False)
+        for position, dtype in enumerate(df.dtypes):
+            if not (
+                dtype == "object"
+                or pd.api.types.is_string_dtype(dtype)
+                or isinstance(dtype, pd.CategoricalDtype)
+            ):
+                continue
+            column = df.iloc[:, position]
+            mask = column.isna() | column.isin([" ", "<NA>"])
+            if mask.any():
+                df.isetitem(position, column.astype(object).where(~mask, None))
+        return df
 
     def _reconnect(self):
-        self._con = pyodbc.connect(self._connection_string, autocommit=True)
+        self._con = self._driver.connect(self._connection_string, autocommit=True)
         self._cur = self._con.cursor()
 
     def _drop_and_recreate_table(self, table_name: str, query: str) -> None:
         try:
             self._cur.execute(f"DROP TABLE {table_name}")
             self._cur.execute(query)
-        except pyodbc.Error as e:
+        except self._driver.Error as e:
             print(f"UserWarning: Could not recreate table {table_name}. Error: {e}")
 
     def _create_table_query(
@@ -104,17 +135,30 @@ class DataFrameToSQL(ColumnsCheck):
         placeholders = ", ".join("?" * len(df.columns))
         return f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
 
+    # Smallest SQL Server type holding every value of the (nullable) integer dtypes
+    _integer_types = {
+        "uint8": "TINYINT",
+        "int8": "SMALLINT",
+        "int16": "SMALLINT",
+        "uint16": "INT",
+        "int32": "INT",
+        "uint32": "BIGINT",
+        "int64": "BIGINT",
+        # Up to 2**64 - 1, beyond BIGINT
+        "uint64": "DECIMAL(20,0)",
+    }
+
     def _infer_schema(
         self, column: str, df: DataFrame, char_length: int, override_length: bool
     ) -> str:
         dtype = str(df[column].dtype).lower()
         if "float" in dtype:
-            return "FLOAT"
+            return "REAL" if dtype == "float32" else "FLOAT"
         elif "int" in dtype:
-            return "BIGINT" if "64" in dtype else "INT"
+            return self._integer_types.get(dtype, "BIGINT")
         elif "datetime" in dtype:
             return "DATE"
-        elif "object" in dtype or "category" in dtype:
+        elif "object" in dtype or "category" in dtype or "string" in dtype:
             max_length = df[column].astype(str).str.len().max()
             length = char_length if override_length or max_length == 0 else max_length
             return f"VARCHAR({length})"
@@ -123,10 +167,7 @@ class DataFrameToSQL(ColumnsCheck):
         raise ValueError(f"Data type of column {column} could not be inferred: {dtype}")
 
     def _prepare_data_for_insertion(self, df: DataFrame) -> list:
-        return [
-            [None if (isinstance(value, float) and np.isnan(value)) else value for value in row]
-            for row in df.values.tolist()
-        ]
+        return frame_to_rows(df)
 
 
 class UploadToSQL(DataFrameToSQL):
@@ -137,6 +178,8 @@ class UploadToSQL(DataFrameToSQL):
         super().__init__(connection_string)
         self._verbose = True
 
+    @profiled("UploadToSQL.execute")
+    @instrument("UploadToSQL.execute")
     def execute(
         self,
         df: DataFrame,
@@ -149,8 +192,16 @@ class UploadToSQL(DataFrameToSQL):
         auto_resolve: bool = True,
         frac: float = 0.01,
         verbose: bool = False,
+        drop_duplicates: bool = False,
     ) -> None:
-        """Executes the import/update operation based on the specified method."""
+        """Executes the import/update operation based on the specified method.
+
+        With `drop_duplicates`, the repeated rows of `df` are not uploaded, see
+        `drop_duplicate_rows`.
+        """
+        if drop_duplicates:
+            df = drop_duplicate_rows(df)
+
         if len(df) <= chunk_size:
             raise ValueError(
                 "'chunk_size' cannot be greater than or equal to the length of the 'DataFrame'. Change the 'chunk_size'."
@@ -1,21 +1,223 @@
+import concurrent.futures
 import os
 from abc import abstractmethod
-from typing import List, Union
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
 
-import missingno as msno
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import yaml
 from loguru import logger
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from pandas.core.frame import DataFrame
+from pandas.core.series import Series
 
 from pydbsmgr.main import check_dtypes, clean_transform, drop_empty_columns, intersection_cols
+from pydbsmgr.utils.instrumentation import instrument
+from pydbsmgr.utils.profiling import profiled
+from pydbsmgr.utils.sketches import FrameSketch
+from pydbsmgr.utils.tools import concat_frames, drop_duplicate_columns, drop_duplicate_rows
 
 # Configure logging globally
 LOG_FILE = "report_{time}.log"
 logger.add(LOG_FILE, rotation="100 KB")
 
 
+REPORT_COLUMNS = [
+    "column name",
+    "data type",
+    "database name",
+    "# rows",
+    "# missing rows",
+    "# missing rows (percentage)",
+    "unique values",
+]
+
+
+def profile_frame(df: DataFrame, df_name: str, extended: bool = False) -> DataFrame:
+    """Profile all the columns of a `DataFrame` with one vectorized pass per statistic.
+
+    Parameters
+    ----------
+    df : `DataFrame`
+        The `DataFrame` to be profiled. Columns containing `unnamed` are skipped.
+    df_name : `str`
+        The name reported in the `database name` column.
+    extended : `bool`, `optional`
+        Whether to add the `min value` and `max value` of numeric and datetime columns.
+        Defaults to `False`.
+
+    Returns
+    -------
+    `DataFrame`
+        One row per column with the health report columns.
+    """
+    keep = ~np.asarray(df.columns.astype(str).str.lower().str.contains("unnamed"))
+    n_rows = len(df)
+    missing = df.isna().sum().to_numpy()[keep]
+
+    info_df = pd.DataFrame(
+        {
+            "column name": df.columns[keep],
+            "data type": df.dtypes.astype(str).to_numpy()[keep],
+            "database name": df_name,
+            "# rows": n_rows,
+            "# missing rows": missing,
+            "# missing rows (percentage)": missing / n_rows if n_rows else np.nan,
+            "unique values": df.nunique(dropna=False).to_numpy()[keep],
+        },
+        columns=REPORT_COLUMNS,
+    )
+
+    if extended:
+        ordered = df.iloc[:, keep].select_dtypes(include=["number", "datetime", "bool"])
+        info_df["min value"] = info_df["column name"].map(ordered.min())
+        info_df["max value"] = info_df["column name"].map(ordered.max())
+
+    return info_df
+
+
+def missingness_matrix(df: DataFrame, bins: int = 100) -> np.ndarray:
+    """Fraction of missing values per column in `bins` consecutive buckets of rows.
+
+    Returns
+    -------
+    `np.ndarray`
+        Array of shape `(min(bins, len(df)), len(df.columns))`.
+    """
+    n_bins = max(min(bins, len(df)), 1)
+    edges = np.linspace(0, len(df), n_bins + 1).astype(np.int64)[:-1]
+    mask = df.isna().to_numpy()
+    if len(df) == 0:
+        return np.zeros((1, mask.shape[1]))
+    counts = np.diff(np.append(edges, len(df)))
+    return np.add.reduceat(mask, edges, axis=0) / counts[:, np.newaxis]
+
+
+def plot_missingness(df: DataFrame, file_name: str, bins: int = 100, dpi: int = 100) -> None:
+    """Save a heatmap of the missing values of a `DataFrame` aggregated by row buckets.
+
+    It uses the object-oriented `matplotlib` API, so several plots can be rendered in
+    parallel threads.
+    """
+    matrix = missingness_matrix(df, bins)
+    figure = Figure(figsize=(max(6, 0.3 * len(df.columns)), 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    image = ax.imshow(
+        1 - matrix,
+        aspect="auto",
+        cmap="Greys",
+        vmin=0,
+        vmax=1,
+        interpolation="nearest",
+        extent=(-0.5, len(df.columns) - 0.5, len(df), 0),
+    )
+    ax.set_xticks(range(len(df.columns)))
+    ax.set_xticklabels([str(col) for col in df.columns], rotation=90)
+    ax.set_ylabel("row")
+    figure.colorbar(image, ax=ax, label="fraction of non-missing values")
+    figure.tight_layout()
+    figure.savefig(file_name, dpi=dpi)
+
+
+def profile_sketch(sketch: FrameSketch, df_name: str) -> DataFrame:
+    """Build the health report rows from the mergeable statistics of a `FrameSketch`.
+
+    The `unique values` are approximate (HyperLogLog), every other column is exact.
+    """
+    summary = sketch.summary()
+    summary = summary[~summary["column"].astype(str).str.lower().str.contains("unnamed")]
+    rows = summary["rows"].to_numpy()
+    missing = summary["missing"].to_numpy()
+    return pd.DataFrame(
+        {
+            "column name": summary["column"].to_numpy(),
+            "data type": summary["dtype"].to_numpy(),
+            "database name": df_name,
+            "# rows": rows,
+            "# missing rows": missing,
+            "# missing rows (percentage)": np.divide(
+                missing, rows, out=np.full(len(rows), np.nan), where=rows > 0
+            ),
+            "unique values": summary["unique"].to_numpy(),
+        },
+        columns=REPORT_COLUMNS,
+    )
+
+
+def profile(df: DataFrame, df_name: str, approximate: bool = False) -> DataFrame:
+    """Health report rows of a `DataFrame`, exact or based on a `FrameSketch`."""
+    if approximate:
+        return profile_sketch(FrameSketch.from_frame(df), df_name)
+    return profile_frame(df, df_name)
+
+
+def widen_dtype(values: Series, dtype) -> Tuple[Series, object]:
+    """Converts `values` to `dtype`, or to the closest wider type that holds them.
+
+    Integers with missing values become nullable integers (e.g. `Int64`) and with decimals
+    `float64`, booleans with missing values become `boolean`. Numbers and dates are parsed
+    from text, the values that cannot be parsed become missing. Any other type that cannot
+    be cast is widened to `object`.
+
+    Returns
+    -------
+    values, dtype : `Tuple[Series, object]`
+        The converted values and their type.
+    """
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        dates = pd.to_datetime(values, errors="coerce")
+        try:
+            return dates.astype(dtype), dtype
+        except (TypeError, ValueError):
+            return dates, dates.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        try:
+            converted = values.astype("boolean")
+        except (TypeError, ValueError):
+            return values.astype(object), np.dtype(object)
+        if converted.hasnans:
+            return converted, converted.dtype
+        return converted.astype(dtype), dtype
+    if pd.api.types.is_numeric_dtype(dtype):
+        numbers = values
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            numbers = pd.to_numeric(values, errors="coerce")
+        if not pd.api.types.is_integer_dtype(dtype):
+            return numbers.astype(dtype), dtype
+        present = numbers.dropna().to_numpy(dtype=np.float64)
+        if not np.all(np.mod(present, 1) == 0):
+            return numbers.astype("float64"), np.dtype("float64")
+        if numbers.hasnans:
+            dtype = pd.api.types.pandas_dtype(str(dtype).capitalize().replace("Uint", "UInt"))
+        return numbers.astype(dtype), dtype
+    try:
+        return values.astype(dtype), dtype
+    except (TypeError, ValueError):
+        return values.astype(object), np.dtype(object)
+
+
+def run_with_logs(func: Callable, *args) -> Tuple[object, List[Tuple[str, str]]]:
+    """Run `func` in a worker process and return its result with the captured log records.
+
+    The handlers inherited from the parent process are removed from the worker, the parent
+    is responsible for emitting the returned `(level, message)` records.
+    """
+    logger.remove()
+    records = []
+    handler_id = logger.add(
+        lambda message: records.append((message.record["level"].name, message.record["message"]))
+    )
+    try:
+        return func(*args), records
+    finally:
+        logger.remove(handler_id)
+
+
 class FrameCheck:
     """Class for checking and transforming a `DataFrame`/dataframes"""
 
@@ -35,7 +237,16 @@ class FrameCheck:
         else:
             raise TypeError("Input should be either a single dataframe or a list of dataframes")
 
-    def fix(self, cols_upper_case: bool = False, drop_empty_cols: bool = True) -> None:
+    @profiled("FrameCheck.fix")
+    @instrument("FrameCheck.fix")
+    def fix(
+        self,
+        cols_upper_case: bool = False,
+        drop_empty_cols: bool = True,
+        n_jobs: int = 1,
+        shard_columns: bool = False,
+        drop_duplicates: bool = False,
+    ) -> None:
         """Performs the clean of the data and validation
 
         Parameters
@@ -43,19 +254,100 @@ class FrameCheck:
         cols_upper_case : `bool`, `optional`
             Indicates whether to convert column names to uppercase. Defaults to `False`.
         drop_empty_cols : `bool`, `optional`
-            Variable indicating whether columns with all their values empty should be removed. Defaults to `True`.
+            Variable indicating whether columns with all their values empty should be removed.
+            The columns and values are cleaned either way, `False` no longer skips the whole
+            fix. Defaults to `True`.
+        n_jobs : `int`, `optional`
+            Number of worker processes, each one fixes a whole dataframe. Defaults to `1`.
+        shard_columns : `bool`, `optional`
+            With `n_jobs` > 1, splits each dataframe into `n_jobs` groups of columns that are
+            fixed in parallel, useful for a few very wide dataframes. Defaults to `False`.
+        drop_duplicates : `bool`, `optional`
+            Removes the columns whose content repeats an earlier column before fixing, see
+            `drop_duplicate_columns`, and the repeated rows after fixing, so rows that only
+            differ before cleaning (e.g. `"ABC "` and `"Abc"`) are duplicates. Defaults to `False`.
         """
-        if drop_empty_cols:
+        if drop_duplicates:
+            for count, df in enumerate(self._dfs):
+                n_columns = df.shape[1]
+                self._dfs[count] = drop_duplicate_columns(df)
+                logger.info(
+                    f"{count+1}) {n_columns - self._dfs[count].shape[1]} duplicate columns "
+                    "have been removed."
+                )
+
+        if n_jobs == 1:
             for count, df in enumerate(self._dfs):
-                self._dfs[count] = drop_empty_columns(df)
-                logger.info(f"{count+1}) Empty columns have been removed.")
-                self._dfs[count].columns = clean_transform(df.columns, cols_upper_case)
-                logger.info(f"{count+1}) Columns have been cleaned and transformed.")
-                self._dfs[count] = self._ops_dtypes(df, count)
+                self._dfs[count] = self._fix_frame(df, count, cols_upper_case, drop_empty_cols)
+        else:
+            self._fix_frames_parallel(cols_upper_case, drop_empty_cols, n_jobs, shard_columns)
+
+        if drop_duplicates:
+            for count, df in enumerate(self._dfs):
+                self._dfs[count] = drop_duplicate_rows(df)
+                logger.info(
+                    f"{count+1}) {len(df) - len(self._dfs[count])} duplicate rows "
+                    "have been removed."
+                )
+
+    def _fix_frames_parallel(
+        self, cols_upper_case: bool, drop_empty_cols: bool, n_jobs: int, shard_columns: bool
+    ) -> None:
+        """Fixes the dataframes, or groups of their columns, in `n_jobs` worker processes."""
+
+        tasks = []
+        for count, df in enumerate(self._dfs):
+            shards = (
+                np.array_split(np.arange(df.shape[1]), n_jobs) if shard_columns else [slice(None)]
+            )
+            tasks += [(count, df.iloc[:, shard]) for shard in shards]
+
+        fix_frame = self._worker_view()._fix_frame
+        results = {}
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(
+                    run_with_logs, fix_frame, df, count, cols_upper_case, drop_empty_cols
+                )
+                for count, df in tasks
+            ]
+            for (count, _), future in zip(tasks, futures):
+                df, records = future.result()
+                for level, message in records:
+                    logger.log(level, message)
+                results.setdefault(count, []).append(df)
+
+        for count, shards in results.items():
+            self._dfs[count] = shards[0] if len(shards) == 1 else pd.concat(shards, axis=1)
+
+    def _fix_frame(
+        self, df: DataFrame, count: int, cols_upper_case: bool, drop_empty_cols: bool
+    ) -> DataFrame:
+        """Fix a single dataframe, it may run in a worker process."""
+        if drop_empty_cols:
+            df = drop_empty_columns(df)
+            logger.info(f"{count+1}) Empty columns have been removed.")
+        df = df.set_axis(clean_transform(df.columns, cols_upper_case), axis=1)
+        logger.info(f"{count+1}) Columns have been cleaned and transformed.")
+        return self._ops_dtypes(df, count)
+
+    def _worker_view(self) -> "FrameCheck":
+        """Copy of the instance without its dataframes, cheap to send to worker processes."""
+        view = self.__class__.__new__(self.__class__)
+        view.__dict__.update({k: v for k, v in self.__dict__.items() if k != "_dfs"})
+        return view
+
+    def _get_names(self) -> List[str]:
+        if isinstance(self.df_names, list):
+            return self.df_names
+        if isinstance(self.df_names, str) and len(self._dfs) == 1:
+            return [self.df_names]
+        return [f"{self.df_names or 'dataframe'}_{j}" for j in range(len(self._dfs))]
 
     def get_frames(self) -> List[DataFrame]:
         return self._dfs
 
+    @instrument("FrameCheck.generate_report")
     def generate_report(
         self,
         report_name: str = "./report.html",
@@ -64,6 +356,12 @@ class FrameCheck:
         directory_name: str = "summary",
         concat_vertically: bool = False,
         encoding: str = "utf-8",
+        approximate: bool = False,
+        max_workers: int | None = None,
+        images: bool = True,
+        plot_engine: str = "binned",
+        bins: int = 100,
+        n_jobs: int = 1,
     ) -> None:
         """Generate a `.html` health check report.
 
@@ -81,8 +379,21 @@ class FrameCheck:
             Variable indicating whether the list of dataframes should be vertically concatenated into a single one. Default value is `False`.
         encoding : `str`, `optional`
             The encoding of dataframes. Defaults to `utf-8`.
+        approximate : `bool`, `optional`
+            Whether to profile the dataframes with mergeable sketches, chunk by chunk and in
+            parallel threads. The `unique values` are then approximate. Defaults to `False`.
+        max_workers : `int` | `None`, `optional`
+            Maximum number of threads used to profile and to render. Defaults to `None`.
+        images : `bool`, `optional`
+            Whether to save the missing values plot of each dataframe. Defaults to `True`.
+        plot_engine : `str`, `optional`
+            `binned` draws the missing fraction of `bins` buckets of rows, rendered in parallel.
+            `msno` draws every row with `missingno.matrix`. Defaults to `binned`.
+        bins : `int`, `optional`
+            Number of row buckets of the `binned` plot. Defaults to `100`.
+        n_jobs : `int`, `optional`
+            Number of worker processes used to profile the dataframes. Defaults to `1`.
         """
-        self.df_files_info = pd.DataFrame()
         self.yaml_name = yaml_name
         self.database_name = database_name
 
@@ -92,48 +403,52 @@ class FrameCheck:
 
         if concat_vertically:
             self._dfs = intersection_cols(self._dfs)
-            self._dfs = [pd.concat(self._dfs, axis=0)]
-
-        for j, df in enumerate(self._dfs):
-            ax = msno.matrix(df)
-            ax.get_figure().savefig(f"./{directory_name}/{j}_msno_report.png", dpi=300)
-
-            info = [
-                [
-                    col,
-                    str(df.dtypes[col]),
-                    self.df_names[j],
-                    len(df),
-                    df.isnull().sum()[col],
-                    df.isnull().sum()[col] / len(df),
-                    len(df[col].unique()),
-                ]
-                for col in df.columns
-                if "unnamed" not in col.lower()
+            self._dfs = [
+                concat_frames((self._dfs.pop(0) for _ in range(len(self._dfs))), ignore_index=False)
             ]
 
-            info_df = pd.DataFrame(
-                info,
-                columns=[
-                    "column name",
-                    "data type",
-                    "database name",
-                    "# rows",
-                    "# missing rows",
-                    "# missing rows (percentage)",
-                    "unique values",
-                ],
-            )
+        df_names = self._get_names()
+        approximate_flags = [approximate] * len(self._dfs)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            if images:
+                self._save_images(executor, directory_name, plot_engine, bins)
+            if n_jobs > 1:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=n_jobs) as processes:
+                    infos = list(processes.map(profile, self._dfs, df_names, approximate_flags))
+            elif approximate:
+                infos = list(executor.map(profile, self._dfs, df_names, approximate_flags))
+            else:
+                infos = list(map(profile, self._dfs, df_names))
 
+        for j, info_df in enumerate(infos):
             self._format_info_df(info_df)
-            logger.info(f"DataFrame '{self.df_names[j]}' has been processed")
-            self.df_files_info = pd.concat([self.df_files_info, info_df])
+            logger.info(f"DataFrame '{df_names[j]}' has been processed")
+        self.df_files_info = pd.concat(infos)
 
         self.df_files_info.to_html(report_name, index=False, encoding=encoding)
         logger.info(f"A report has been created under the name '{report_name}'")
 
         self._create_yaml_tree()
 
+    def _save_images(
+        self,
+        executor: concurrent.futures.Executor,
+        directory_name: str,
+        plot_engine: str,
+        bins: int,
+    ) -> None:
+        file_names = [f"./{directory_name}/{j}_msno_report.png" for j in range(len(self._dfs))]
+        if plot_engine == "binned":
+            list(executor.map(plot_missingness, self._dfs, file_names, [bins] * len(self._dfs)))
+        elif plot_engine == "msno":
+            import missingno as msno
+
+            for df, file_name in zip(self._dfs, file_names):
+                ax = msno.matrix(df)
+                ax.get_figure().savefig(file_name, dpi=300)
+        else:
+            raise ValueError(f"Unsupported plot engine: {plot_engine}")
+
     def _format_info_df(self, df: DataFrame) -> None:
         df["# missing rows (percentage)"] = df["# missing rows (percentage)"].apply(
             lambda x: f"{x:.2%}"
@@ -164,3 +479,232 @@ class FrameCheck:
 
         with open(self.yaml_name, "w") as file:
             yaml.dump({self.database_name: data}, file)
+
+
+class StreamingFrameCheck(FrameCheck):
+    """Class for checking and transforming a dataset too large for memory, chunk by chunk.
+
+    The columns kept, their names and their data types are decided with the first chunk and
+    applied to every following chunk. A type is only widened (see `widen_dtype`) when a later
+    chunk needs it, e.g. an `int64` column with missing values becomes `Int64`, and the
+    report shows the types that were written. The report is built from mergeable statistics
+    (`FrameSketch`), so its `unique values` are approximate.
+
+    Parameters
+    ----------
+    source : `str` | `Iterable[DataFrame]`
+        An iterable of chunks, or the path of a `.parquet` file (read in record batches with
+        `pyarrow`) or of a `.csv` file (read with `pandas.read_csv(chunksize=...)`). An iterator
+        can only be consumed once, by `fix` or by `generate_report`.
+    df_name : `str`, `optional`
+        The name reported in the `database name` column. Defaults to `dataframe`.
+    chunk_size : `int`, `optional`
+        Number of rows per chunk read from a file. Defaults to `1_000_000`.
+    **read_kwargs
+        Passed to `pandas.read_csv` or to `pyarrow.parquet.ParquetFile.iter_batches`.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Iterable[DataFrame]],
+        df_name: str = "dataframe",
+        chunk_size: int = 1_000_000,
+        **read_kwargs,
+    ) -> None:
+        self.source = source
+        self.df_names = df_name
+        self.chunk_size = chunk_size
+        self.read_kwargs = read_kwargs
+        self.sketch = None
+        self._dfs = []
+
+    def iter_chunks(self) -> Iterator[DataFrame]:
+        """Yields the chunks of the source as they are read."""
+        if not isinstance(self.source, str):
+            yield from self.source
+        elif self.source.endswith(".parquet"):
+            parquet_file = pq.ParquetFile(self.source)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_size, **self.read_kwargs):
+                yield batch.to_pandas()
+        elif self.source.endswith(".csv"):
+            yield from pd.read_csv(self.source, chunksize=self.chunk_size, **self.read_kwargs)
+        else:
+            raise ValueError(f"Unsupported file type: {self.source}, use `.csv` or `.parquet`")
+
+    @profiled("StreamingFrameCheck.fix")
+    @instrument("StreamingFrameCheck.fix")
+    def fix(
+        self,
+        cols_upper_case: bool = False,
+        drop_empty_cols: bool = True,
+        output_path: str | None = None,
+        dtypes: dict | None = None,
+    ) -> None:
+        """Cleans every chunk and writes it to `output_path` as soon as it is cleaned
+
+        Parameters
+        ----------
+        cols_upper_case : `bool`, `optional`
+            Indicates whether to convert column names to uppercase. Defaults to `False`.
+        drop_empty_cols : `bool`, `optional`
+            Whether to remove the columns that are empty in the first chunk. A warning is
+            logged if they have values in a later chunk. Defaults to `True`.
+        output_path : `str` | `None`, `optional`
+            A `.parquet` file written one row group per chunk, or a `.csv` file. Defaults to
+            `None`, only the statistics are kept.
+        dtypes : `dict` | `None`, `optional`
+            Data types of some cleaned columns, instead of those of the first chunk. Needed
+            for a `.parquet` output when a later chunk widens a column to another Arrow type
+            (e.g. `int64` to `float64`). Defaults to `None`.
+        """
+        self.sketch = FrameSketch()
+        writer = None
+        try:
+            for count, chunk in enumerate(self.iter_chunks()):
+                if count == 0:
+                    self._lock_schema(chunk, cols_upper_case, drop_empty_cols, dtypes)
+                df = self._fix_chunk(chunk, count)
+                self.sketch.update(df)
+                if output_path is not None:
+                    writer = self._write_chunk(df, output_path, writer)
+                logger.info(f"{count+1}) The chunk of {len(df):,} rows has been processed.")
+        finally:
+            if writer is not None:
+                writer.close()
+        # Report the types that were written, not those of the first chunk
+        for col, column_sketch in self.sketch.columns.items():
+            column_sketch.dtype = str(self._dtypes[col])
+
+    def _lock_schema(
+        self, chunk: DataFrame, cols_upper_case: bool, drop_empty_cols: bool, dtypes: dict | None
+    ) -> None:
+        """Decides the columns, names and data types of every chunk from the first one."""
+        kept = drop_empty_columns(chunk).columns if drop_empty_cols else chunk.columns
+        self._source_columns = chunk.columns
+        self._kept_columns = kept
+        self._column_names = clean_transform(kept, cols_upper_case)
+        self._requested_dtypes = dtypes or {}
+        self._dtypes = None
+        self._first_dtypes = None
+        self._arrow_schema = None
+
+    def _fix_chunk(self, chunk: DataFrame, count: int) -> DataFrame:
+        dropped = self._source_columns.difference(self._kept_columns)
+        if count > 0 and len(dropped) and chunk.reindex(columns=dropped).notna().any(axis=None):
+            logger.warning(
+                f"{count+1}) Columns empty in the first chunk have values, they are dropped."
+            )
+        df = chunk.reindex(columns=self._kept_columns).set_axis(self._column_names, axis=1)
+        df = self._ops_dtypes(df, count)
+        if self._dtypes is None:
+            dtypes = df.dtypes.copy()
+            for col, dtype in self._requested_dtypes.items():
+                dtypes[col] = pd.api.types.pandas_dtype(dtype)
+            self._dtypes = self._first_dtypes = dtypes
+        return self._apply_dtypes(df, count)
+
+    def _apply_dtypes(self, df: DataFrame, count: int) -> DataFrame:
+        """Casts the chunk to the data types decided with the first chunk, widening them when
+        the chunk needs it (see `widen_dtype`). The widened types are kept for the next chunks."""
+        df = df.reindex(columns=self._dtypes.index)
+        dtypes = self._dtypes.copy()
+        for position, (col, dtype) in enumerate(self._dtypes.items()):
+            values = df.iloc[:, position]
+            if values.dtype == dtype:
+                continue
+            converted, new_dtype = widen_dtype(values, dtype)
+            lost = int((converted.isna() & values.notna()).sum())
+            if lost:
+                logger.warning(
+                    f"{count+1}) {lost} values of the column '{col}' are not of the type "
+                    f"{dtype} of the first chunk, they have been replaced by missing values."
+                )
+            if new_dtype != dtype:
+                logger.info(f"{count+1}) The column '{col}' has been widened to {new_dtype}.")
+                dtypes[col] = new_dtype
+            df.isetitem(position, converted)
+        self._dtypes = dtypes
+        return df
+
+    def _write_chunk(self, df: DataFrame, output_path: str, writer):
+        if output_path.endswith(".csv"):
+            header = writer is None
+            writer = writer or open(output_path, "w", newline="")
+            df.to_csv(writer, header=header, index=False)
+            return writer
+        if not output_path.endswith(".parquet"):
+            raise ValueError(f"Unsupported output file: {output_path}, use `.csv` or `.parquet`")
+
+        # Mixed object columns are written as text, as in the `.csv` output
+        df = df.assign(
+            **{
+                col: df[col].where(df[col].isna(), df[col].astype(str))
+                for col in df.columns[df.dtypes == object]
+            }
+        )
+        if self._arrow_schema is not None:
+            try:
+                table = pa.Table.from_pandas(df, schema=self._arrow_schema, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                raise ValueError(
+                    f"The chunk does not fit the `.parquet` schema of the first chunk, give the "
+                    f"data types of the widened columns {self._widened_columns()} with `dtypes`."
+                ) from e
+            writer.write_table(table)
+            return writer
+
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        self._arrow_schema = pa.schema(
+            [
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in schema
+            ]
+        )
+        writer = pq.ParquetWriter(output_path, self._arrow_schema)
+        writer.write_table(
+            pa.Table.from_pandas(df, schema=self._arrow_schema, preserve_index=False)
+        )
+        return writer
+
+    def _widened_columns(self) -> List[str]:
+        return [col for col, dtype in self._dtypes.items() if dtype != self._first_dtypes[col]]
+
+    @instrument("StreamingFrameCheck.generate_report")
+    def generate_report(
+        self,
+        report_name: str = "./report.html",
+        yaml_name: str = "./output.yaml",
+        database_name: str = "database",
+        encoding: str = "utf-8",
+    ) -> None:
+        """Generate a `.html` health check report of the cleaned chunks, or of the raw chunks
+        if `fix` has not been called.
+
+        Parameters
+        ----------
+        report_name : `str`, `optional`
+            Name of the quality assessment report. Defaults to `./report.html`.
+        yaml_name : `str`, `optional`
+            Indicates the name of the `.yaml` file that will serve as a template for the creation of the SQL table. Defaults to `./output.yaml`.
+        database_name : `str`, `optional`
+            The header of the `.yaml` file. Default value is `database`
+        encoding : `str`, `optional`
+            The encoding of the report. Defaults to `utf-8`.
+        """
+        self.yaml_name = yaml_name
+        self.database_name = database_name
+
+        if self.sketch is None:
+            self.sketch = FrameSketch()
+            for chunk in self.iter_chunks():
+                self.sketch.update(chunk)
+
+        info_df = profile_sketch(self.sketch, self.df_names)
+        self._format_info_df(info_df)
+        logger.info(f"DataFrame '{self.df_names}' has been processed")
+        self.df_files_info = info_df
+
+        self.df_files_info.to_html(report_name, index=False, encoding=encoding)
+        logger.info(f"A report has been created under the name '{report_name}'")
+
+        self._create_yaml_tree()
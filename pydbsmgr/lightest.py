@@ -6,8 +6,10 @@ import numpy as np
 import pandas as pd
 import polars as pl
 
-from pydbsmgr.main import check_if_contains_dates, clean, get_date_format
-from pydbsmgr.utils.tools import most_repeated_item
+from pydbsmgr.main import check_if_contains_dates, clean, factorize_apply, get_date_format
+from pydbsmgr.utils.instrumentation import instrument
+from pydbsmgr.utils.profiling import profiled
+from pydbsmgr.utils.tools import drop_duplicate_columns, drop_duplicate_rows, most_repeated_item
 
 logging.basicConfig(level=logging.WARNING)
 
@@ -60,6 +62,17 @@ def process_dates(
         return x  # Return original string if no valid date is found
 
 
+def _clean_twice(value: str, no_emoji: bool, title_mode: bool) -> str:
+    """The two cleaning passes of `clean_frame(fast_execution=False)` on a single value."""
+    return clean(clean(value), no_emoji=no_emoji, title_mode=title_mode)
+
+
+def _series_from_codes(name: str, codes: np.ndarray, results: np.ndarray) -> pl.Series:
+    """Builds the `String` series of `results[codes]`, where a code of `-1` is a null."""
+    values = pl.Series(name, [*results, None], dtype=pl.String)
+    return values.gather(np.where(codes < 0, len(results), codes))
+
+
 class LightCleaner:
     """Performs a light cleaning on the table."""
 
@@ -69,11 +82,15 @@ class LightCleaner:
         self.df = pl.from_pandas(df_)
         self.dict_dtypes = {"float": pl.Float64, "int": pl.Int64, "str": pl.String}
 
+    @profiled("LightCleaner.clean_frame")
+    @instrument("LightCleaner.clean_frame")
     def clean_frame(
         self,
         sample_frac: float = 0.1,
         fast_execution: bool = True,
         two_date_formats: bool = True,
+        categorical: bool = False,
+        drop_duplicates: bool = False,
         **kwargs,
     ) -> pd.DataFrame:
         """DataFrame cleaning main function
@@ -84,6 +101,12 @@ class LightCleaner:
             The fraction of rows to use for date type inference. Default is 0.1 i.e., 10%.
         fast_execution : `bool`
             If `False` use `applymap` pandas for extra text cleanup. Default is `True`.
+        categorical : `bool`
+            If `True`, each distinct value of a text column is cleaned once and the column is
+            returned as a `category`. Missing values are kept as missing. Default is `False`.
+        drop_duplicates : `bool`
+            If `True`, the columns whose cleaned content repeats an earlier column and the
+            repeated rows are removed, see `drop_duplicate_columns`. Default is `False`.
 
         Keyword Arguments:
         ----------
@@ -97,7 +120,7 @@ class LightCleaner:
         errors = kwargs.get("errors", "ignore")
 
         if sample_frac != 1.0:
-            table_sample = table.sample(frac=sample_frac, with_replacement=False)
+            table_sample = table.sample(fraction=sample_frac, with_replacement=False)
         else:
             table_sample = table.clone()
 
@@ -130,11 +153,16 @@ class LightCleaner:
                         auxiliary_type=None,
                         errors=errors,
                     )
-                    vpartial_dates = np.vectorize(partial_dates)
-
-                    _serie = pl.Series(
-                        cols[column_index], vpartial_dates(table[cols[column_index]].to_list())
-                    )
+                    if categorical:
+                        _serie = _series_from_codes(
+                            cols[column_index],
+                            *factorize_apply(table[cols[column_index]].to_numpy(), partial_dates),
+                        )
+                    else:
+                        vpartial_dates = np.vectorize(partial_dates)
+                        _serie = pl.Series(
+                            cols[column_index], vpartial_dates(table[cols[column_index]].to_list())
+                        )
                     table = table.with_columns(_serie)
                     table = table.with_columns(
                         pl.col(cols[column_index]).str.strptime(
@@ -142,6 +170,20 @@ class LightCleaner:
                         )
                     )
 
+                elif categorical:
+                    clean_value = clean
+                    if not fast_execution:
+                        clean_value = partial(
+                            _clean_twice,
+                            no_emoji=kwargs.get("no_emoji", False),
+                            title_mode=kwargs.get("title_mode", True),
+                        )
+                    _serie = _series_from_codes(
+                        cols[column_index],
+                        *factorize_apply(table[cols[column_index]].to_numpy(), clean_value),
+                    )
+                    table = table.with_columns(_serie.cast(pl.Categorical))
+
                 else:
                     try:
                         partial_clean = partial(clean)
@@ -172,7 +214,9 @@ class LightCleaner:
                             )
                         )
 
-        table = self._remove_duplicate_columns(table)
+        table = self._remove_duplicate_columns(table, by_content=drop_duplicates)
+        if drop_duplicates:
+            table = drop_duplicate_rows(table)
         self.df = table.clone()
         return self.df.to_pandas()
 
@@ -186,11 +230,12 @@ class LightCleaner:
                 return np.nan if datatype in ["float", "int"] else ""
         return value
 
-    def _remove_duplicate_columns(self, df: pl.DataFrame) -> pl.DataFrame:
-        """Remove duplicate columns based on column name."""
+    def _remove_duplicate_columns(self, df: pl.DataFrame, by_content: bool = False) -> pl.DataFrame:
+        """Remove duplicate columns based on column name, or also on content if `by_content`."""
         seen = set()
         unique_cols = [col for col in df.columns if not (col in seen or seen.add(col))]
-        return df.select(unique_cols)
+        df = df.select(unique_cols)
+        return drop_duplicate_columns(df) if by_content else df
 
 
 if __name__ == "__main__":
@@ -1,18 +1,83 @@
+import atexit
+import csv
 import os
+import queue
+import shutil
+import threading
+import time
+import weakref
 from datetime import datetime
-from typing import List
+from functools import partial
+from typing import List, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 
 class EventLogger:
-    """Allows you to store screen prints in a plain text file."""
+    """Allows you to store screen prints in a plain text file.
 
-    def __init__(self, file_name: str, file_path: str) -> None:
+    Parameters
+    ----------
+    file_name : `str`
+        Name of the log file, without extension.
+    file_path : `str`
+        Directory of the log file.
+    buffered : `bool`, `optional`
+        If `True`, keeps the file open and writes the lines in batches. The buffer is written
+        when it reaches `buffer_size` characters, on `flush`/`close`, when leaving a `with`
+        block and at interpreter exit, see also `flush_interval`. Lines written after `close`
+        go straight to the file. Defaults to `False`.
+    buffer_size : `int`, `optional`
+        Number of characters kept in memory before writing. Defaults to `65536`.
+    flush_interval : `float`, `optional`
+        Seconds after the last write from which the next line also writes the buffer. With
+        `background`, the thread also writes it after `flush_interval` seconds without new
+        lines. Defaults to `1.0`.
+    background : `bool`, `optional`
+        If `True` (and `buffered`), lines are queued and written by a background thread.
+        Defaults to `False`.
+    verbose : `bool`, `optional`
+        Whether to print each line to the screen. Defaults to `True`.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        file_path: str,
+        buffered: bool = False,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        background: bool = False,
+        verbose: bool = True,
+    ) -> None:
         self.file_name = f"{file_name}.txt"
         self.file_path = file_path
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.verbose = verbose
         self._check_file_existence()
 
+        self._file = None
+        self._buffer = []
+        self._buffer_length = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._closed = False
+        self._atexit = None
+        if buffered:
+            if background:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._background_writer, daemon=True)
+                self._thread.start()
+            # A weak reference, so that the registration does not keep the logger alive
+            self._atexit = partial(_close_logger, weakref.ref(self))
+            atexit.register(self._atexit)
+
     def _check_file_existence(self):
         if os.path.isfile(self.full_path):
             warning_type = "UserWarning"
@@ -24,6 +89,7 @@ class EventLogger:
         return os.path.join(self.file_path, self.file_name)
 
     def audit(self):
+        self.flush()
         if not os.path.isfile(self.full_path):
             warning_type = "UserWarning"
             msg = f"The log file {self.file_name} does not exist."
@@ -34,6 +100,7 @@ class EventLogger:
             input(f"Do you want to delete the log file {self.file_name}? (y/N): ").strip().lower()
         )
         if delete == "y":
+            self.close()
             os.remove(self.full_path)
             warning_type = "UserWarning"
             msg = f"The log file {self.file_name} has been deleted successfully."
@@ -48,17 +115,128 @@ class EventLogger:
         date = datetime.now().strftime("%d/%m/%Y %H:%M:%S ")
         output_line = date + " ".join(chars) + "\n"
 
-        print(output_line, end="")
-        with open(self.full_path, "a") as file:
-            file.write(output_line)
+        if self.verbose:
+            print(output_line, end="")
+        # Under the lock, a line is either queued before `close` drains the queue or written
+        # after it, never queued once the background thread has stopped
+        with self._lock:
+            if not self.buffered or self._closed:
+                with open(self.full_path, "a") as file:
+                    file.write(output_line)
+            elif self._thread is not None:
+                self._queue.put(output_line)
+            else:
+                self._buffer.append(output_line)
+                self._buffer_length += len(output_line)
+                if (
+                    self._buffer_length >= self.buffer_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval
+                ):
+                    self._write_buffer()
+
+    def flush(self) -> None:
+        """Writes all the pending lines to the log file."""
+        if self._thread is not None:
+            self._queue.join()
+        with self._lock:
+            self._write_buffer()
+
+    def close(self) -> None:
+        """Writes the pending lines, stops the background thread and closes the file."""
+        with self._lock:
+            self._closed = True
+        if self._atexit is not None:
+            atexit.unregister(self._atexit)
+            self._atexit = None
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            # Lines queued while the thread was stopping
+            while self._queue is not None and not self._queue.empty():
+                line = self._queue.get_nowait()
+                if line is not None:
+                    self._buffer.append(line)
+                self._queue.task_done()
+            self._write_buffer()
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "EventLogger":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _write_buffer(self) -> None:
+        """Writes the buffer to the persistent file handle, the lock must be held."""
+        if self._buffer:
+            if self._file is None:
+                self._file = open(self.full_path, "a")
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffer_length = 0
+        if self._file is not None:
+            self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def _background_writer(self) -> None:
+        """Moves the queued lines to the buffer and writes it when the queue is idle."""
+        while True:
+            try:
+                line = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self._lock:
+                    self._write_buffer()
+                continue
+            try:
+                if line is None:
+                    return
+                with self._lock:
+                    self._buffer.append(line)
+                    self._buffer_length += len(line)
+                    if self._buffer_length >= self.buffer_size or self._queue.empty():
+                        self._write_buffer()
+            finally:
+                self._queue.task_done()
+
+
+def _close_logger(reference: weakref.ref) -> None:
+    logger = reference()
+    if logger is not None:
+        logger.close()
 
 
 class EventLogBook:
-    """Allows you to create and write new lines in a logbook."""
+    """Allows you to create and write new lines in a logbook.
+
+    Parameters
+    ----------
+    file_name : `str`
+        Name of the logbook, without extension.
+    file_path : `str`
+        Directory of the logbook.
+    encoding : `str`, `optional`
+        Encoding of the `csv` logbook. Defaults to `latin1`.
+    backend : `str`, `optional`
+        `csv` keeps a single file. `parquet` and `arrow` (Arrow IPC) keep a directory with one
+        part file per `create`/`update`, which can be merged with `compact`. Defaults to `csv`.
+    """
 
-    def __init__(self, file_name: str, file_path: str) -> None:
-        self.file_name = f"{file_name}.csv"
+    _extensions = {"csv": "csv", "parquet": "parquet", "arrow": "arrow"}
+
+    def __init__(
+        self, file_name: str, file_path: str, encoding: str = "latin1", backend: str = "csv"
+    ) -> None:
+        if backend not in self._extensions:
+            raise ValueError(f"Unsupported backend: {backend}, use one of {list(self._extensions)}")
+        self.backend = backend
+        self.file_name = f"{file_name}.{self._extensions[backend]}"
         self.file_path = file_path
+        self._encoding = encoding
         self._check_file_existence()
 
     @property
@@ -66,17 +244,23 @@ class EventLogBook:
         return os.path.join(self.file_path, self.file_name)
 
     def _check_file_existence(self):
-        if os.path.isfile(self.full_path):
+        if os.path.exists(self.full_path):
             warning_type = "UserWarning"
             msg = f"The logbook file {self.file_name} already exists, the changes will be added."
             print(f"{warning_type}: {msg}")
 
-    def create(self, df: pd.DataFrame, encoding: str = "latin1") -> None:
-        self._encoding = encoding
-        df.to_csv(self.full_path, index=False, encoding=self._encoding)
+    def create(self, df: pd.DataFrame, encoding: str | None = None) -> None:
+        if encoding is not None:
+            self._encoding = encoding
+        if self.backend == "csv":
+            df.to_csv(self.full_path, index=False, encoding=self._encoding)
+        else:
+            if os.path.isdir(self.full_path):
+                shutil.rmtree(self.full_path)
+            self._write_part(pa.Table.from_pandas(df, preserve_index=False))
 
-    def audit(self, encoding: str = "latin1"):
-        if not os.path.isfile(self.full_path):
+    def audit(self, encoding: str | None = None):
+        if not os.path.exists(self.full_path):
             warning_type = "UserWarning"
             msg = f"The logbook file {self.file_name} does not exist."
             print(f"{warning_type}: {msg}")
@@ -88,28 +272,147 @@ class EventLogBook:
             .lower()
         )
         if delete == "y":
-            os.remove(self.full_path)
+            if os.path.isdir(self.full_path):
+                shutil.rmtree(self.full_path)
+            else:
+                os.remove(self.full_path)
             warning_type = "UserWarning"
             msg = f"The logbook file {self.file_name} has been deleted successfully."
             print(f"{warning_type}: {msg}")
         else:
-            return pd.read_csv(self.full_path, encoding=self._encoding)
+            return self.read(encoding)
 
-    def update(self, rows: List[List[str]]) -> None:
-        try:
-            df = pd.read_csv(self.full_path, encoding=self._encoding)
-            new_df = pd.DataFrame(rows, columns=df.columns)
-            df = pd.concat([df, new_df], ignore_index=True)
-            df.to_csv(self.full_path, index=False, encoding=self._encoding)
+    def read(self, encoding: str | None = None) -> pd.DataFrame:
+        """Returns the whole logbook as a `DataFrame`."""
+        if self.backend == "csv":
+            return pd.read_csv(self.full_path, encoding=encoding or self._encoding)
+        return self._read_parts().to_pandas()
 
-        except FileNotFoundError:
+    def update(self, rows: List[List[str]] | pd.DataFrame) -> None:
+        """Appends the rows to the logbook, only the new rows are written.
+
+        The rows are either lists in the order of the columns of the logbook or a `DataFrame`
+        whose column names must match them.
+        """
+        columns = self._read_columns()
+        if columns is None:
             warning_type = "UserWarning"
             msg = (
                 f"The logbook {self.file_name} has not been created, so it is going to be created."
             )
             print(f"{warning_type}: {msg}")
-            new_df = pd.DataFrame(rows)
-            new_df.to_csv(self.full_path, index=False, encoding=self._encoding)
+            self.create(pd.DataFrame(rows))
+            return
+
+        if isinstance(rows, pd.DataFrame):
+            if [str(col) for col in rows.columns] != columns:
+                raise ValueError(
+                    f"The columns {list(rows.columns)} do not match the columns {columns} of "
+                    f"the logbook {self.file_name}"
+                )
+            rows = rows.values.tolist()
+        if any(len(row) != len(columns) for row in rows):
+            raise ValueError(
+                f"The rows do not match the {len(columns)} columns of the logbook {self.file_name}"
+            )
+        new_df = pd.DataFrame(rows, columns=columns)
+        if self.backend == "csv":
+            new_df.to_csv(
+                self.full_path, mode="a", header=False, index=False, encoding=self._encoding
+            )
+        else:
+            schema = self._read_schema(self._parts()[0])
+            self._write_part(pa.Table.from_pandas(new_df, schema=schema, preserve_index=False))
+
+    def compact(self) -> None:
+        """Merges the part files of a `parquet` or `arrow` logbook into a single file.
+
+        The merged file is a new part `part-<n>-c<last>` that supersedes the parts up to
+        `last`, which are only deleted once it is in place. A crash at any point leaves either
+        the old parts or the merged one visible, never both.
+        """
+        if self.backend == "csv":
+            return
+        parts = self._parts()
+        if len(parts) < 2:
+            return
+        table = self._read_parts()
+        last = self._part_number(parts[-1])[0]
+        path = self._part_path(self._next_part_number(), compacted=last)
+        self._write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        for number, _, part in self._part_entries():
+            if number <= last:
+                os.remove(part)
+
+    def _read_columns(self) -> List[str] | None:
+        """Reads only the header line (or the schema) of the logbook."""
+        if self.backend == "csv":
+            if not os.path.isfile(self.full_path):
+                return None
+            with open(self.full_path, "r", newline="", encoding=self._encoding) as file:
+                return next(csv.reader(file), None)
+        parts = self._parts()
+        if not parts:
+            return None
+        return self._read_schema(parts[0]).names
+
+    def _part_number(self, path: str) -> Tuple[int, int]:
+        """The number of a part and the last part it supersedes (`-1` if not compacted)."""
+        stem = os.path.basename(path)[len("part-") : -len(f".{self.backend}")]
+        number, _, compacted = stem.partition("-c")
+        return int(number), int(compacted) if compacted else -1
+
+    def _part_entries(self) -> List[Tuple[int, int, str]]:
+        """`(number, compacted, path)` of every part file, sorted by number."""
+        if not os.path.isdir(self.full_path):
+            return []
+        return sorted(
+            (*self._part_number(name), os.path.join(self.full_path, name))
+            for name in os.listdir(self.full_path)
+            if name.startswith("part-") and name.endswith(f".{self.backend}")
+        )
+
+    def _parts(self) -> List[str]:
+        """The part files holding the logbook, without those superseded by a compaction."""
+        entries = self._part_entries()
+        superseded = max((compacted for _, compacted, _ in entries), default=-1)
+        return [path for number, _, path in entries if number > superseded]
+
+    def _next_part_number(self) -> int:
+        entries = self._part_entries()
+        return entries[-1][0] + 1 if entries else 0
+
+    def _part_path(self, number: int, compacted: int | None = None) -> str:
+        suffix = f"-c{compacted:05d}" if compacted is not None else ""
+        return os.path.join(self.full_path, f"part-{number:05d}{suffix}.{self.backend}")
+
+    def _write_part(self, table: pa.Table) -> None:
+        os.makedirs(self.full_path, exist_ok=True)
+        self._write_table(table, self._part_path(self._next_part_number()))
+
+    def _write_table(self, table: pa.Table, path: str) -> None:
+        if self.backend == "parquet":
+            pq.write_table(table, path)
+        else:
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def _read_schema(self, path: str) -> pa.Schema:
+        if self.backend == "parquet":
+            return pq.read_schema(path)
+        with pa.OSFile(path, "rb") as source:
+            return pa.ipc.open_file(source).schema
+
+    def _read_parts(self) -> pa.Table:
+        if self.backend == "parquet":
+            tables = [pq.read_table(part) for part in self._parts()]
+        else:
+            tables = []
+            for part in self._parts():
+                with pa.OSFile(part, "rb") as source:
+                    tables.append(pa.ipc.open_file(source).read_all())
+        return pa.concat_tables(tables)
 
 
 # Usage example
@@ -1,18 +1,18 @@
-import datetime
-import glob
 import os
 import re
 import sys
 import warnings
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Callable, List, Tuple
 
 import numpy as np
 import pandas as pd
-from IPython.display import clear_output
 from pandas.core.frame import DataFrame
 from pandas.core.indexes.base import Index
 from pandas.core.series import Series
 
+from pydbsmgr.utils.instrumentation import instrument
+
 warnings.filterwarnings("ignore")
 
 ########################################################################################
@@ -112,6 +112,33 @@ def clean(
         return result
 
 
+COLUMN_NAME_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=256)
+def normalize_columns(columns: Tuple, normalizer: Callable[..., str], **kwargs) -> Tuple[str, ...]:
+    """
+    Applies a column name normalizer to all the names of a schema.
+
+    The result is memoized per schema, so chunks of the same table reuse the mapping
+    instead of normalizing every name again.
+
+    Parameters
+    ----------
+    columns : `Tuple`
+        The column names of the schema.
+    normalizer : `Callable[..., str]`
+        Function that receives a column name and `kwargs` and returns the new name.
+
+    Returns
+    -------
+    `Tuple[str, ...]`
+        The normalized column names.
+    """
+    return tuple(normalizer(col, **kwargs) for col in columns)
+
+
+@lru_cache(maxsize=COLUMN_NAME_CACHE_SIZE)
 def clean_transform_helper(
     col: str, mode: bool = True, remove_numeric: bool = True, remove_spaces: bool = True
 ) -> str:
@@ -165,12 +192,15 @@ def clean_transform(
     col_name_list : `str`
         The transformed column names as a `list` of strings.
     """
-    return [
-        clean_transform_helper(
-            col, mode=mode, remove_spaces=remove_spaces, remove_numeric=remove_numeric
+    return list(
+        normalize_columns(
+            tuple(col_index),
+            clean_transform_helper,
+            mode=mode,
+            remove_spaces=remove_spaces,
+            remove_numeric=remove_numeric,
         )
-        for col in col_index
-    ]
+    )
 
 
 def remove_char(input_string: str) -> str:
@@ -354,7 +384,42 @@ def correct_nan(check_missing: str) -> str:
     return check_missing
 
 
-def check_dtypes(dataframe: DataFrame, datatypes: Series) -> DataFrame:
+def factorize_apply(values, func: Callable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Applies `func` once per distinct non-missing value.
+
+    Parameters
+    ----------
+    values : `array-like`
+        The values, e.g. a `Series` or a `numpy` array.
+    func : `Callable`
+        The function applied to each distinct value.
+
+    Returns
+    -------
+    codes, results : `Tuple[np.ndarray, np.ndarray]`
+        The position of each value in `results`, `-1` for missing values, and the result of
+        `func` for each distinct value.
+    """
+    codes, uniques = pd.factorize(values)
+    results = np.empty(len(uniques), dtype=object)
+    for position, value in enumerate(uniques):
+        results[position] = func(value)
+    return codes, results
+
+
+def categorical_from_codes(codes: np.ndarray, results: np.ndarray) -> pd.Categorical:
+    """
+    Builds the `Categorical` of `results[codes]` without materializing it. Distinct values
+    with the same result share a category, missing results and codes of `-1` are missing.
+    """
+    result_codes, categories = pd.factorize(results)
+    # The appended `-1` is picked by the codes of the missing values
+    return pd.Categorical.from_codes(np.append(result_codes, -1)[codes], categories=categories)
+
+
+@instrument("check_dtypes")
+def check_dtypes(dataframe: DataFrame, datatypes: Series, categorical: bool = False) -> DataFrame:
     """
     Checks and updates the data types of columns in a `DataFrame`.
 
@@ -364,6 +429,9 @@ def check_dtypes(dataframe: DataFrame, datatypes: Series) -> DataFrame:
         The `DataFrame` to check and update the data types.
     datatypes : `Series`
         The `Series` containing the desired data types for each column in the `DataFrame`.
+    categorical : `bool`, `optional`
+        If `True`, each distinct value is cleaned once and the text columns are returned as
+        `category` columns. Missing values are kept as missing. Defaults to `False`.
 
     Returns
     -------
@@ -373,7 +441,11 @@ def check_dtypes(dataframe: DataFrame, datatypes: Series) -> DataFrame:
     cols = dataframe.columns
 
     for column_index, datatype in enumerate(datatypes):
-        if datatype == "object" or datatype == "datetime64[ns]":
+        if categorical and (datatype == "object" or datatype == "datetime64[ns]"):
+            dataframe[cols[column_index]] = _check_dtype_categorical(
+                dataframe[cols[column_index]], cols[column_index]
+            )
+        elif datatype == "object" or datatype == "datetime64[ns]":
             dataframe[cols[column_index]] = dataframe[cols[column_index]].apply(
                 clean_and_convert_to
             )
@@ -395,18 +467,31 @@ def check_dtypes(dataframe: DataFrame, datatypes: Series) -> DataFrame:
     return dataframe
 
 
+def _check_dtype_categorical(column: Series, name: str) -> Series:
+    """Cleaning of `check_dtypes` applied once per distinct value of the column."""
+    codes, results = factorize_apply(column, lambda value: correct_nan(clean_and_convert_to(value)))
+    try:
+        results = np.array([str.strip(value) for value in results], dtype=object)
+    except TypeError:
+        try:
+            dates = Series(results).astype("datetime64[ns]").to_numpy()
+            return Series(np.append(dates, np.datetime64("NaT"))[codes], index=column.index)
+        except (TypeError, ValueError):
+            warning_type = "UserWarning"
+            msg = "It was not possible to convert the column {%s} to datetime64[ns] type" % name
+            print(f"{warning_type}: {msg}")
+    return Series(categorical_from_codes(codes, results), index=column.index)
+
+
 def drop_empty_columns(df_: DataFrame) -> DataFrame:
     """
-    Function that removes empty columns
+    Function that removes empty columns. The input is returned as is when no column is empty.
     """
-    cols_to_keep = []
-    for col in df_.columns:
-        if not (pd.isnull(df_[col]).sum() == len(df_[col])):
-            cols_to_keep.append(col)
-    return df_[cols_to_keep].copy()
+    non_empty = df_.notna().any().to_numpy()
+    return df_ if non_empty.all() else df_.loc[:, non_empty]
 
 
-def intersection_cols(dfs_: List[DataFrame]) -> DataFrame:
+def intersection_cols(dfs_: List[DataFrame]) -> List[DataFrame]:
     """
     Function that resolves columns issues of a `list` of dataframes
 
@@ -418,20 +503,20 @@ def intersection_cols(dfs_: List[DataFrame]) -> DataFrame:
     Returns
     -------
     dfs_ : List[DataFrame]
-        The `list` of dataframes with the corrections in their columns (intersection).
+        The `list` of dataframes restricted to the columns shared by all of them, in the order
+        of the first dataframe. Dataframes that already have those columns are not copied.
     """
-    min_cols = []
-    index_dfs = []
+    common_cols = set(dfs_[0].columns).intersection(*(df.columns for df in dfs_[1:]))
+    cols_ = dfs_[0].columns[dfs_[0].columns.isin(common_cols)]
     for i, df in enumerate(dfs_):
-        min_cols.append(len(df.columns))
-        index_dfs.append(i)
-    df_dict = dict(zip(min_cols, index_dfs))
-
-    min_col = min(min_cols)
-    index_min = df_dict[min_col]
-    cols_ = set(dfs_[index_min].columns)
-    for i, df in enumerate(dfs_):
-        dfs_[i] = (dfs_[i][list(cols_)]).copy()
+        if df.columns.equals(cols_):
+            continue
+        positions = df.columns.get_indexer(cols_) if df.columns.is_unique else []
+        if len(positions) and np.array_equal(positions, np.arange(positions[0], positions[-1] + 1)):
+            # A contiguous slice of columns can be a view instead of a copy
+            dfs_[i] = df.iloc[:, positions[0] : positions[-1] + 1]
+        else:
+            dfs_[i] = df[cols_]
 
     return dfs_
 
@@ -446,46 +531,6 @@ def clearConsole():
 ########################################################################################
 
 if __name__ == "__main__":
-    today = datetime.date.today()
-    date = str(today)
-    print("Today date is: ", today)
-
-    # directory_path = os.getcwd()
-    # directory_path = input("Enter directory path of the database: ")
-
-    directory_path = sys.argv[1]
-    if len(sys.argv) > 2:
-        for i in range(2, len(sys.argv)):
-            directory_path += " " + sys.argv[i]
-    directory_path.replace("\\", "/")
-    print("You have selected the path :", directory_path)
-
-    extension = ".xlsx"
-
-    print("Searching files...")
-    dirs = glob.glob(directory_path + "/**/*" + extension, recursive=True)
-    print("Found files :", len(dirs))
-    df_sheet_files_info = pd.DataFrame()
-
-    if not os.path.exists("Detail of the report"):
-        print("Directory created : ", "Detail of the report")
-        os.mkdir("Detail of the report")
-
-    j = 0
-    docs = []
-    docs.append(["rpt_name", "name_xls", "sheet_name"])
-    with pd.ExcelWriter("./Detail of the report/mult_sheets_database.xlsx") as writer:
-        for i in dirs:
-            xls = pd.ExcelFile(i)
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name=sheet_name, index_col=None)
-                name_xls = i
-                name_xls = name_xls.replace(directory_path, "")
-                name_xls = name_xls.replace("\\", "")
-                name_xls = name_xls.replace(extension, "")
-                print("Reading file : ", name_xls, "sheet :", sheet_name)
-                df = df.T.drop_duplicates().T
-                df.to_excel(writer, sheet_name="rpt_" + str(j), index=False)
-                docs.append(["rpt_" + str(j), name_xls, sheet_name])
-                clearConsole()
-                clear_output(wait=True)
+    from pydbsmgr.consolidate import main
+
+    sys.exit(main())
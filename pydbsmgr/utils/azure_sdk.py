@@ -1,15 +1,20 @@
+import asyncio
 import os
 import re
-from io import BytesIO, StringIO
+from functools import partial
+from io import BytesIO, StringIO, TextIOWrapper
 from typing import List, Tuple
 
 import pyarrow.parquet as pq
 from azure.storage.blob import BlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 from dotenv import load_dotenv
-from pandas import read_csv, read_excel
+from pandas import read_csv
 from pandas.core.frame import DataFrame
 
-from pydbsmgr.utils.tools import ControllerFeatures
+from pydbsmgr.utils.instrumentation import span
+from pydbsmgr.utils.profiling import profiled
+from pydbsmgr.utils.tools import ControllerFeatures, read_excel_sheets, write_parquet_stream
 
 
 def get_connection_string() -> str:
@@ -18,11 +23,91 @@ def get_connection_string() -> str:
     return os.getenv("CONNECTION_STRING")
 
 
+def parse_blob(
+    blob_name: str,
+    blob_data: bytes,
+    file_type: str,
+    columns: List[str] | None = None,
+    filters: List[Tuple] | None = None,
+    max_workers: int | None = 1,
+) -> List[Tuple[str, DataFrame]]:
+    """Convert the content of a downloaded blob into named dataframes.
+
+    Parameters
+    ----------
+    blob_name : `str`
+        Full name of the blob, used to name the dataframes.
+    blob_data : `bytes`
+        Content of the blob.
+    file_type : `str`
+        Either `parquet` or `excel_csv`.
+    columns : `List[str]` | `None`, `optional`
+        Columns to be read from `.parquet` files. Defaults to `None`.
+    filters : `List[Tuple]` | `None`, `optional`
+        Row filters applied to `.parquet` files. Defaults to `None`.
+    max_workers : `int` | `None`, `optional`
+        Worker processes reading the sheets of a `.xlsx` file, see `read_excel_sheets`.
+        Defaults to `1`, no worker processes.
+
+    Returns
+    -------
+    `List[Tuple[str, DataFrame]]`
+        One element per file or, for `.xlsx` files, per sheet.
+    """
+    with span("parse_blob", bytes=len(blob_data)) as parse_span:
+        frames = _parse_blob(blob_name, blob_data, file_type, columns, filters, max_workers)
+        parse_span.add(rows=sum(len(df) for _, df in frames))
+    return frames
+
+
+def _parse_blob(
+    blob_name: str,
+    blob_data: bytes,
+    file_type: str,
+    columns: List[str] | None,
+    filters: List[Tuple] | None,
+    max_workers: int | None,
+) -> List[Tuple[str, DataFrame]]:
+    """Decode the blob, see `parse_blob`."""
+    frames = []
+    if file_type == "parquet":
+        df_name = blob_name.rsplit(".", 2)[0].rsplit("/", 1)[-1]
+        with BytesIO(blob_data) as bytes_io:
+            df = pq.read_table(bytes_io, columns=columns, filters=filters).to_pandas()
+            frames.append((df_name, df))
+
+    elif file_type == "excel_csv":
+        filename, extension = os.path.splitext(blob_name.split("/")[-1])
+        if extension == ".csv":
+            try:
+                blob_str = blob_data.decode("utf-8")
+            except UnicodeDecodeError:
+                blob_str = blob_data.decode("latin-1")
+            with StringIO(blob_str) as csv_file:
+                df = read_csv(csv_file, index_col=None, low_memory=False)
+                frames.append((filename, df))
+        elif extension == ".xlsx":
+            for sheet_name, df in read_excel_sheets(blob_data, max_workers=max_workers).items():
+                frames.append((f"{filename}-{sheet_name}", df.reset_index(drop=True)))
+
+    return frames
+
+
 class StorageController(ControllerFeatures):
     """Retrieve blobs from a container/directory"""
 
-    def __init__(self, connection_string: str, container_name: str):
-        """Create blob storage client and container client"""
+    def __init__(self, connection_string: str, container_name: str, **kwargs):
+        """Create blob storage client and container client
+
+        Keyword Arguments:
+        ----------
+        max_concurrency : `int`
+            Number of blobs uploaded at the same time. By default it is set to `4`.
+        block_size : `int`
+            Size in bytes of each staged block. By default it is set to `8 MiB`.
+        row_group_size : `int`
+            Number of rows per parquet row group. By default it is set to `100_000`.
+        """
         self.__connection_string = connection_string
         self.container_name = container_name
 
@@ -30,7 +115,7 @@ class StorageController(ControllerFeatures):
             self.__connection_string
         )
         self._container_client = self._blob_service_client.get_container_client(self.container_name)
-        super().__init__(self._container_client)
+        super().__init__(self._container_client, **kwargs)
 
     def get_blob_list(self, directory_name: str) -> List[str]:
         blob_prefixes = self._get_blob_prefix(directory_name)
@@ -41,10 +126,20 @@ class StorageController(ControllerFeatures):
             self._container_client.walk_blobs(name_starts_with=directory_name + "/", delimiter="/")
         )
 
+    @profiled("StorageController.get_parquet")
     def get_parquet(
-        self, directory_name: str, regex: str, manual_mode: bool = False
+        self,
+        directory_name: str,
+        regex: str,
+        manual_mode: bool = False,
+        columns: List[str] | None = None,
+        filters: List[Tuple] | None = None,
     ) -> Tuple[List[DataFrame], List[str]]:
-        """Perform reading of `.parquet` and `.parquet.gzip` files in container-directory"""
+        """Perform reading of `.parquet` and `.parquet.gzip` files in container-directory
+
+        `columns` and `filters` are passed to `pyarrow.parquet.read_table`, so only the
+        selected columns are decoded and row groups whose statistics do not match are skipped.
+        """
         file_list = (
             self.file_list
             if manual_mode
@@ -52,7 +147,7 @@ class StorageController(ControllerFeatures):
                 name_starts_with=directory_name + "/", delimiter="/"
             )
         )
-        return self._read_files(file_list, regex, "parquet")
+        return self._read_files(file_list, regex, "parquet", columns=columns, filters=filters)
 
     def upload_parquet(
         self,
@@ -64,25 +159,31 @@ class StorageController(ControllerFeatures):
         overwrite: bool = True,
     ) -> None:
         """Perform upload of `.parquet` and `.parquet.gzip` files in container-directory"""
+        uploads = []
         for df, blob_name in zip(dfs, blob_names):
-            blob_path_name = f"{directory_name}/{blob_name}"
-            parquet_data = df.to_parquet(
-                index=False, engine="pyarrow", compression="gzip" if compression else None
-            )
-            self._container_client.upload_blob(
-                name=(
-                    f"{blob_path_name}.{format_type}.gz"
-                    if compression
-                    else f"{blob_path_name}.{format_type}"
-                ),
-                data=parquet_data,
-                overwrite=overwrite,
+            blob_path_name = f"{directory_name}/{blob_name}.{format_type}"
+            uploads.append(
+                (
+                    f"{blob_path_name}.gz" if compression else blob_path_name,
+                    partial(
+                        write_parquet_stream,
+                        data=df,
+                        row_group_size=self.row_group_size,
+                        compression="gzip" if compression else None,
+                    ),
+                )
             )
+        self._upload_streams(uploads, overwrite)
 
     def get_excel_csv(
-        self, directory_name: str, regex: str, manual_mode: bool = False
+        self,
+        directory_name: str,
+        regex: str,
+        manual_mode: bool = False,
+        max_workers: int | None = 1,
     ) -> Tuple[List[DataFrame], List[str]]:
-        """Perform reading of `.xlsx` and `.csv` files in container-directory"""
+        """Perform reading of `.xlsx` and `.csv` files in container-directory, `max_workers`
+        processes read the sheets of each `.xlsx` file (see `read_excel_sheets`)"""
         file_list = (
             self.file_list
             if manual_mode
@@ -90,7 +191,7 @@ class StorageController(ControllerFeatures):
                 name_starts_with=directory_name + "/", delimiter="/"
             )
         )
-        return self._read_files(file_list, regex, "excel_csv")
+        return self._read_files(file_list, regex, "excel_csv", max_workers=max_workers)
 
     def upload_excel_csv(
         self,
@@ -102,26 +203,33 @@ class StorageController(ControllerFeatures):
         overwrite: bool = True,
     ) -> None:
         """Perform upload of `.xlsx` and `.csv` files in container-directory"""
-        for df, blob_name in zip(dfs, blob_names):
-            blob_path_name = f"{directory_name}/{blob_name}"
-            if format_type == "csv":
-                csv_data = df.to_csv(index=False, encoding=encoding)
-                self._container_client.upload_blob(
-                    name=f"{blob_path_name}.csv", data=csv_data, overwrite=overwrite
-                )
-            elif format_type == "xlsx":
-                xlsx_data = BytesIO()
-                with xlsx_data:
-                    df.to_excel(xlsx_data, index=False)
-                    self._container_client.upload_blob(
-                        name=f"{blob_path_name}.xlsx",
-                        data=xlsx_data.getvalue(),
-                        overwrite=overwrite,
-                    )
-            else:
-                raise ValueError(f"Unsupported format: {format_type}")
-
-    def _read_files(self, file_list, regex, file_type):
+        if format_type == "csv":
+            write_fn = partial(self._write_csv, encoding=encoding)
+        elif format_type == "xlsx":
+            write_fn = self._write_xlsx
+        else:
+            raise ValueError(f"Unsupported format: {format_type}")
+
+        uploads = [
+            (f"{directory_name}/{blob_name}.{format_type}", partial(write_fn, df=df))
+            for df, blob_name in zip(dfs, blob_names)
+        ]
+        self._upload_streams(uploads, overwrite)
+
+    def _write_csv(self, sink, df: DataFrame, encoding: str) -> None:
+        """Encode the `.csv` text in chunks directly into `sink`."""
+        text_sink = TextIOWrapper(sink, encoding=encoding, newline="")
+        df.to_csv(text_sink, index=False, chunksize=self.row_group_size)
+        text_sink.flush()
+        text_sink.detach()
+
+    def _write_xlsx(self, sink, df: DataFrame) -> None:
+        """The `.xlsx` workbook has to be built in memory before it is staged."""
+        with BytesIO() as xlsx_data:
+            df.to_excel(xlsx_data, index=False)
+            sink.write(xlsx_data.getbuffer())
+
+    def _read_files(self, file_list, regex, file_type, columns=None, filters=None, max_workers=1):
         """Read files based on the given type and regex filter."""
         dataframes = []
         dataframe_names = []
@@ -132,31 +240,11 @@ class StorageController(ControllerFeatures):
                 continue
 
             blob_data = self._download_blob(file.name)
-
-            if file_type == "parquet":
-                df_name = file.name.rsplit(".", 2)[0].rsplit("/", 1)[-1]
+            for df_name, df in parse_blob(
+                file.name, blob_data, file_type, columns, filters, max_workers
+            ):
                 dataframe_names.append(df_name)
-                with BytesIO(blob_data) as bytes_io:
-                    df = pq.read_table(bytes_io).to_pandas()
-                    dataframes.append(df)
-
-            elif file_type == "excel_csv":
-                filename, extension = os.path.splitext(file.name.split("/")[-1])
-                if extension == ".csv":
-                    try:
-                        blob_str = blob_data.decode("utf-8")
-                    except UnicodeDecodeError:
-                        blob_str = blob_data.decode("latin-1")
-                    dataframe_names.append(filename)
-                    with StringIO(blob_str) as csv_file:
-                        df = read_csv(csv_file, index_col=None, low_memory=False)
-                        dataframes.append(df)
-                elif extension == ".xlsx":
-                    with BytesIO(blob_data) as xlsx_buffer:
-                        all_sheets = read_excel(xlsx_buffer, sheet_name=None, index_col=None)
-                        for sheet_name, df in all_sheets.items():
-                            dataframe_names.append(f"{filename}-{sheet_name}")
-                            dataframes.append(df.reset_index(drop=True))
+                dataframes.append(df)
 
         return dataframes, dataframe_names
 
@@ -165,7 +253,10 @@ class StorageController(ControllerFeatures):
         blob_client = self._blob_service_client.get_blob_client(
             container=self.container_name, blob=blob_name
         )
-        return blob_client.download_blob().readall()
+        with span("download_blob") as download_span:
+            blob_data = blob_client.download_blob().readall()
+            download_span.add(bytes=len(blob_data))
+        return blob_data
 
     def show_all_blobs(self) -> None:
         """Show directories from a container"""
@@ -174,11 +265,11 @@ class StorageController(ControllerFeatures):
             if len(blob.name.split("/")) > 1:
                 print(f"\tBlob name : {blob.name}")
 
-    def get_all_blob(self, filter_criteria: str = None) -> List[str]:
-        """Get all blob names from a container"""
+    def get_all_blob(self, filter_criteria: str = None, prefix: str = None) -> List[str]:
+        """Get all blob names from a container, `prefix` restricts the listing on the server"""
         blob_names = [
             blob.name
-            for blob in self._container_client.list_blobs()
+            for blob in self._container_client.list_blobs(name_starts_with=prefix)
             if len(blob.name.split("/")) > 1
         ]
         return self._list_filter(blob_names, filter_criteria) if filter_criteria else blob_names
@@ -195,3 +286,138 @@ class StorageController(ControllerFeatures):
     def _list_filter(self, elements: list, character: str) -> List[str]:
         """Filter a list based on a criteria."""
         return [element for element in elements if character in element]
+
+
+class AsyncStorageController:
+    """Retrieve blobs from a container/directory using `asyncio`
+
+    It requires `aiohttp`, installed with `pip install pydbsmgr[async]`. All the requests
+    share the HTTP session of a single `BlobServiceClient` and at most `max_concurrency` of
+    them are in flight at the same time. Decoding of the files runs in worker threads so the
+    event loop is not blocked.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        container_name: str,
+        max_concurrency: int = 64,
+        row_group_size: int = 100_000,
+    ):
+        """Create async blob storage client and container client"""
+        self.__connection_string = connection_string
+        self.container_name = container_name
+        self.row_group_size = row_group_size
+
+        try:
+            self._blob_service_client = AsyncBlobServiceClient.from_connection_string(
+                self.__connection_string
+            )
+        except ImportError as e:
+            raise ImportError(
+                "AsyncStorageController requires aiohttp, install it with "
+                "`pip install pydbsmgr[async]` or `pip install aiohttp`."
+            ) from e
+        self._container_client = self._blob_service_client.get_container_client(self.container_name)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> "AsyncStorageController":
+        await self._blob_service_client.__aenter__()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the HTTP session shared by all the requests"""
+        await self._blob_service_client.close()
+
+    async def get_blob_list(self, directory_name: str) -> List[str]:
+        blob_prefixes = self._container_client.walk_blobs(
+            name_starts_with=directory_name + "/", delimiter="/"
+        )
+        return sorted([blob["name"] async for blob in blob_prefixes])
+
+    async def get_parquet(
+        self,
+        directory_name: str,
+        regex: str,
+        columns: List[str] | None = None,
+        filters: List[Tuple] | None = None,
+    ) -> Tuple[List[DataFrame], List[str]]:
+        """Perform concurrent reading of `.parquet` and `.parquet.gzip` files in
+        container-directory"""
+        return await self._read_files(directory_name, regex, "parquet", columns, filters)
+
+    async def get_excel_csv(
+        self, directory_name: str, regex: str, max_workers: int | None = 1
+    ) -> Tuple[List[DataFrame], List[str]]:
+        """Perform concurrent reading of `.xlsx` and `.csv` files in container-directory.
+        Every file is already parsed in its own thread, so `max_workers` processes per `.xlsx`
+        file (see `read_excel_sheets`) should be kept low."""
+        return await self._read_files(directory_name, regex, "excel_csv", max_workers=max_workers)
+
+    async def upload_parquet(
+        self,
+        directory_name: str,
+        dfs: List[DataFrame],
+        blob_names: List[str],
+        format_type: str = "parquet",
+        compression: bool = True,
+        overwrite: bool = True,
+    ) -> None:
+        """Perform concurrent upload of `.parquet` and `.parquet.gzip` files in
+        container-directory"""
+
+        async def upload(df: DataFrame, blob_name: str) -> None:
+            blob_path_name = f"{directory_name}/{blob_name}.{format_type}"
+            async with self._semaphore:
+                parquet_data = await asyncio.to_thread(
+                    self._to_parquet_bytes, df, "gzip" if compression else None
+                )
+                await self._container_client.upload_blob(
+                    name=f"{blob_path_name}.gz" if compression else blob_path_name,
+                    data=parquet_data,
+                    overwrite=overwrite,
+                )
+
+        await asyncio.gather(*(upload(df, blob_name) for df, blob_name in zip(dfs, blob_names)))
+
+    def _to_parquet_bytes(self, df: DataFrame, compression: str | None) -> bytes:
+        with BytesIO() as buffer:
+            write_parquet_stream(buffer, df, self.row_group_size, compression)
+            return buffer.getvalue()
+
+    async def _read_files(
+        self, directory_name, regex, file_type, columns=None, filters=None, max_workers=1
+    ):
+        """Download and read the matching files concurrently, keeping the listing order."""
+        file_names = []
+        async for file in self._container_client.walk_blobs(
+            name_starts_with=directory_name + "/", delimiter="/"
+        ):
+            if not re.search(regex, file.name, re.IGNORECASE):
+                print(f"Ignoring {file.name}, does not match {regex}")
+                continue
+            file_names.append(file.name)
+
+        async def read(file_name: str) -> List[Tuple[str, DataFrame]]:
+            async with self._semaphore:
+                blob_data = await self._download_blob(file_name)
+            return await asyncio.to_thread(
+                parse_blob, file_name, blob_data, file_type, columns, filters, max_workers
+            )
+
+        dataframes = []
+        dataframe_names = []
+        for frames in await asyncio.gather(*(read(file_name) for file_name in file_names)):
+            for df_name, df in frames:
+                dataframe_names.append(df_name)
+                dataframes.append(df)
+
+        return dataframes, dataframe_names
+
+    async def _download_blob(self, blob_name):
+        """Download a blob from Azure Storage."""
+        stream = await self._container_client.download_blob(blob_name)
+        return await stream.readall()
@@ -0,0 +1,267 @@
+"""Lightweight timing spans for the pipeline stages.
+
+Instrumentation is disabled by default, set the `PYDBSMGR_INSTRUMENT` environment variable to
+`1` (or call `enable`) to record the spans. A disabled span costs one attribute lookup.
+
+Example
+-------
+>>> from pydbsmgr.utils import instrumentation
+>>> instrumentation.enable()
+>>> with instrumentation.span("load", rows=len(df)) as s:
+...     s.add(bytes=1024)
+>>> instrumentation.summary()
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, List
+
+ENV_VAR = "PYDBSMGR_INSTRUMENT"
+
+SUMMARY_FIELDS = [
+    "name",
+    "calls",
+    "total_ms",
+    "mean_ms",
+    "max_ms",
+    "rows",
+    "bytes",
+    "peak_rss_mb",
+]
+
+
+class Span:
+    """A timed stage. `rows` and `bytes` are counters that can be increased with `add`."""
+
+    __slots__ = ["name", "parent", "start_ns", "duration_ns", "rows", "bytes", "peak_rss"]
+
+    def __init__(self, name: str, parent: str | None, rows: int = 0, bytes: int = 0) -> None:
+        self.name = name
+        self.parent = parent
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.rows = rows
+        self.bytes = bytes
+        self.peak_rss = 0
+
+    def add(self, rows: int = 0, bytes: int = 0) -> None:
+        self.rows += rows
+        self.bytes += bytes
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class _NullSpan:
+    """Span returned while the instrumentation is disabled."""
+
+    __slots__ = []
+
+    def add(self, rows: int = 0, bytes: int = 0) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    def __init__(self, recorder: "Instrumentation", span: Span) -> None:
+        self._recorder = recorder
+        self._span = span
+
+    def __enter__(self) -> Span:
+        self._recorder._open(self._span)
+        self._span.start_ns = time.perf_counter_ns()
+        return self._span
+
+    def __exit__(self, *args) -> None:
+        self._span.duration_ns = time.perf_counter_ns() - self._span.start_ns
+        self._recorder._close(self._span)
+
+
+class Instrumentation:
+    """Records the spans of the current process.
+
+    Parameters
+    ----------
+    enabled : `bool`, `optional`
+        Whether spans are recorded. Defaults to `False`.
+    sample_interval : `float`, `optional`
+        Seconds between two samples of the resident memory (RSS) of the process, which are
+        taken by a background thread while any span is open. Defaults to `0.01`.
+    log : `bool`, `optional`
+        Whether each finished span is also sent to the `loguru` logger. Defaults to `False`.
+    """
+
+    def __init__(self, enabled: bool = False, sample_interval: float = 0.01, log: bool = False):
+        self.enabled = enabled
+        self.sample_interval = sample_interval
+        self.log = log
+        self.spans: List[Span] = []
+        self._open_spans: List[Span] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._process = None
+
+    def span(self, name: str, rows: int = 0, bytes: int = 0):
+        """Context manager timing the block. Yields the `Span` to update its counters."""
+        if not self.enabled:
+            return _NULL_SPAN
+        stack = self._stack()
+        return _ActiveSpan(self, Span(name, stack[-1].name if stack else None, rows, bytes))
+
+    def instrument(self, name: str | None = None) -> Callable:
+        """Decorator recording a span for every call of the function."""
+
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self) -> List[Dict]:
+        """Aggregates the recorded spans by name, in order of first appearance."""
+        rows: Dict[str, Dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            row = rows.setdefault(span.name, dict.fromkeys(SUMMARY_FIELDS, 0))
+            row["name"] = span.name
+            row["calls"] += 1
+            row["total_ms"] += span.duration_ns / 1e6
+            row["max_ms"] = max(row["max_ms"], span.duration_ns / 1e6)
+            row["rows"] += span.rows
+            row["bytes"] += span.bytes
+            row["peak_rss_mb"] = max(row["peak_rss_mb"], span.peak_rss / 2**20)
+        for row in rows.values():
+            row["mean_ms"] = row["total_ms"] / row["calls"]
+        return [{field: row[field] for field in SUMMARY_FIELDS} for row in rows.values()]
+
+    def export(self, path: str) -> None:
+        """Writes the summary to a `.json` (summary and spans) or `.csv` (summary) file."""
+        if path.endswith(".json"):
+            with self._lock:
+                spans = [span.to_dict() for span in self.spans]
+            with open(path, "w") as file:
+                json.dump({"summary": self.summary(), "spans": spans}, file, indent=2)
+        elif path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.summary())
+        else:
+            raise ValueError(f"Unsupported export format: {path}, use `.json` or `.csv`")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _open(self, span: Span) -> None:
+        self._stack().append(span)
+        rss = self._rss()
+        with self._lock:
+            span.peak_rss = rss
+            self._open_spans.append(span)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, daemon=True)
+                self._sampler.start()
+
+    def _close(self, span: Span) -> None:
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        rss = self._rss()
+        with self._lock:
+            span.peak_rss = max(span.peak_rss, rss)
+            self._open_spans.remove(span)
+            self.spans.append(span)
+        if self.log:
+            from loguru import logger
+
+            logger.info(
+                f"span {span.name}: {span.duration_ns / 1e6:.3f} ms, rows={span.rows}, "
+                f"bytes={span.bytes}, peak_rss={span.peak_rss / 2**20:.1f} MB"
+            )
+
+    def _rss(self) -> int:
+        if self._process is None:
+            import psutil
+
+            self._process = psutil.Process()
+        return self._process.memory_info().rss
+
+    def _sample(self) -> None:
+        """Updates the peak RSS of the open spans until none is left."""
+        while True:
+            time.sleep(self.sample_interval)
+            rss = self._rss()
+            with self._lock:
+                if not self._open_spans:
+                    self._sampler = None
+                    return
+                for span in self._open_spans:
+                    span.peak_rss = max(span.peak_rss, rss)
+
+
+_instrumentation = Instrumentation(enabled=os.getenv(ENV_VAR, "").lower() in ("1", "true", "yes"))
+
+
+def get_instrumentation() -> Instrumentation:
+    """Returns the instrumentation shared by all the `pydbsmgr` modules."""
+    return _instrumentation
+
+
+def enable(log: bool = False) -> None:
+    """Starts recording spans, `log` also sends every finished span to `loguru`."""
+    _instrumentation.enabled = True
+    _instrumentation.log = log
+
+
+def disable() -> None:
+    _instrumentation.enabled = False
+
+
+def span(name: str, rows: int = 0, bytes: int = 0):
+    """Times a block with the shared instrumentation, see `Instrumentation.span`."""
+    return _instrumentation.span(name, rows, bytes)
+
+
+def instrument(name: str | None = None) -> Callable:
+    """Decorator timing a function with the shared instrumentation."""
+    return _instrumentation.instrument(name)
+
+
+def summary() -> List[Dict]:
+    return _instrumentation.summary()
+
+
+def export(path: str) -> None:
+    _instrumentation.export(path)
+
+
+def reset() -> None:
+    _instrumentation.reset()
@@ -0,0 +1,172 @@
+"""Opt-in profiling of the top-level entry points.
+
+The functions decorated with `profiled` (`LightCleaner.clean_frame`, `FrameCheck.fix`,
+`UploadToSQL.execute` and `StorageController.get_parquet`) run under a profiler when the
+`PYDBSMGR_PROFILE` environment variable is set, or inside a `profiling` block:
+
+- `cprofile` writes a `.pstats` file per run, to be read with `pstats` or `snakeviz`.
+- `sampling` samples the stacks of all threads every `interval` seconds and writes a
+  `.collapsed` file per run, ready for `flamegraph.pl` or `speedscope`.
+
+The files are written to `PYDBSMGR_PROFILE_DIR` (`./profiles` by default) and named after the
+entry point, the time of the run, the process id and a per-process run counter.
+
+Example
+-------
+>>> from pydbsmgr.utils.profiling import profiling
+>>> with profiling("sampling") as paths:
+...     LightCleaner(df).clean_frame()
+>>> paths
+['profiles/LightCleaner.clean_frame-20240101-120000-1234-0.collapsed']
+"""
+
+import cProfile
+import itertools
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable
+
+ENV_VAR = "PYDBSMGR_PROFILE"
+DIR_ENV_VAR = "PYDBSMGR_PROFILE_DIR"
+MODES = ("cprofile", "sampling")
+
+_settings = {}
+_local = threading.local()
+_run_counter = itertools.count()
+
+
+def _get_settings() -> dict:
+    """Settings of the innermost `profiling` block, otherwise from the environment."""
+    if _settings:
+        return _settings
+    mode = os.getenv(ENV_VAR, "").lower()
+    if mode in ("", "0", "false", "no"):
+        return {}
+    return {
+        "mode": "cprofile" if mode in ("1", "true", "yes") else mode,
+        "output_dir": os.getenv(DIR_ENV_VAR, "profiles"),
+        "interval": 0.005,
+        "paths": [],
+    }
+
+
+@contextmanager
+def profiling(mode: str = "cprofile", output_dir: str = "profiles", interval: float = 0.005):
+    """Profiles every entry point called inside the block, yields the list of written files.
+
+    Parameters
+    ----------
+    mode : `str`, `optional`
+        Either `cprofile` or `sampling`. Defaults to `cprofile`.
+    output_dir : `str`, `optional`
+        Directory of the profiles. Defaults to `profiles`.
+    interval : `float`, `optional`
+        Seconds between two samples of the `sampling` profiler. Defaults to `0.005`.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unsupported profiling mode: {mode}, use one of {list(MODES)}")
+    previous = dict(_settings)
+    paths = []
+    _settings.update(mode=mode, output_dir=output_dir, interval=interval, paths=paths)
+    try:
+        yield paths
+    finally:
+        _settings.clear()
+        _settings.update(previous)
+
+
+def profiled(name: str) -> Callable:
+    """Decorator running the function under the active profiler, see `profiling`."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            settings = _get_settings()
+            # Nested entry points are part of the profile of the outermost one
+            if not settings or getattr(_local, "active", False):
+                return func(*args, **kwargs)
+            _local.active = True
+            try:
+                return _run_profiled(name, settings, func, *args, **kwargs)
+            finally:
+                _local.active = False
+
+        return wrapper
+
+    return decorator
+
+
+def _run_profiled(name: str, settings: dict, func: Callable, *args, **kwargs):
+    os.makedirs(settings["output_dir"], exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    # The counter keeps the runs that start in the same second apart
+    run = next(_run_counter)
+    path = os.path.join(settings["output_dir"], f"{name}-{stamp}-{os.getpid()}-{run}")
+    if settings["mode"] == "cprofile":
+        profiler = cProfile.Profile()
+        path += ".pstats"
+    elif settings["mode"] == "sampling":
+        profiler = SamplingProfiler(settings["interval"])
+        path += ".collapsed"
+    else:
+        raise ValueError(f"Unsupported profiling mode: {settings['mode']}")
+
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        settings["paths"].append(path)
+
+
+class SamplingProfiler:
+    """Low-overhead profiler that samples the stacks of all the threads from a daemon thread.
+
+    Parameters
+    ----------
+    interval : `float`, `optional`
+        Seconds between two samples. Defaults to `0.005`.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enable(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def dump_stats(self, path: str) -> None:
+        """Writes the samples as collapsed stacks, one `frame;frame;... count` line each."""
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    file_name = os.path.basename(code.co_filename)
+                    stack.append(f"{code.co_name} ({file_name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
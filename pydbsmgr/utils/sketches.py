@@ -0,0 +1,229 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+from pandas.core.series import Series
+
+
+def hash_values(values: Series) -> np.ndarray:
+    """Returns the 64-bit hashes of the non-null values of a `Series`."""
+    return pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy()
+
+
+class HyperLogLog:
+    """Mergeable approximate distinct counter.
+
+    Parameters
+    ----------
+    p : `int`
+        Number of bits used to address the `2**p` registers. The relative standard error is
+        about `1.04 / sqrt(2**p)`, i.e. 0.8% for the default value of `14`.
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Adds an array of 64-bit hashes to the sketch."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return self
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Position of the leftmost 1-bit in the remaining `64 - p` bits
+        bit_length = np.zeros(hashes.size, dtype=np.int64)
+        nonzero = remainder > 0
+        bit_length[nonzero] = np.frexp(remainder[nonzero].astype(np.float64))[1]
+        rank = (64 - self.p) - bit_length + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Only sketches with the same precision can be merged.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Returns the estimated number of distinct values."""
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class KLLSketch:
+    """Mergeable approximate quantiles sketch (KLL compactors).
+
+    Parameters
+    ----------
+    k : `int`
+        Capacity of each compactor, larger values are more accurate. Defaults to `200`.
+    seed : `int`
+        Seed of the random offsets used when compacting. Defaults to `0`.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        """Adds an array of numeric values to the sketch, `nan` values are ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(sum(len(items) << level for level, items in enumerate(self.levels)))
+
+    def quantile(self, q: float | List[float]) -> float | np.ndarray:
+        """Returns the approximate value(s) at the given quantile(s)."""
+        items = np.concatenate(self.levels)
+        if items.size == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate(
+            [np.full(len(items), 1 << level) for level, items in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side="left")
+        return items[order][np.minimum(positions, items.size - 1)]
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                if len(items) % 2:
+                    self.levels[level], items = items[-1:], items[:-1]
+                else:
+                    self.levels[level] = np.empty(0)
+                promoted = items[self._rng.integers(2) :: 2]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+
+class ColumnSketch:
+    """Mergeable statistics of a single column."""
+
+    def __init__(self, dtype: str = "object", p: int = 14, k: int = 200):
+        self.dtype = dtype
+        self.rows = 0
+        self.missing = 0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog(p)
+        self.quantiles = KLLSketch(k)
+
+    def update(self, values: Series) -> "ColumnSketch":
+        missing = int(values.isna().sum())
+        self.rows += len(values)
+        self.missing += missing
+        if missing < len(values):
+            self.distinct.update(hash_values(values))
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                self.quantiles.update(values.to_numpy(dtype=np.float64, na_value=np.nan))
+            if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(
+                values
+            ):
+                self._update_range(values.min(), values.max())
+        return self
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        self.rows += other.rows
+        self.missing += other.missing
+        self.distinct.merge(other.distinct)
+        self.quantiles.merge(other.quantiles)
+        if other.min is not None:
+            self._update_range(other.min, other.max)
+        return self
+
+    def _update_range(self, min_value, max_value) -> None:
+        self.min = min_value if self.min is None else min(self.min, min_value)
+        self.max = max_value if self.max is None else max(self.max, max_value)
+
+    @property
+    def unique(self) -> int:
+        """Approximate distinct values, a missing value counts as one like in `unique()`."""
+        return self.distinct.count() + (1 if self.missing else 0)
+
+
+class FrameSketch:
+    """Mergeable statistics of a `DataFrame`, built chunk by chunk.
+
+    Parameters
+    ----------
+    p : `int`, `optional`
+        Precision of the `HyperLogLog` distinct counters. Defaults to `14`.
+    k : `int`, `optional`
+        Capacity of the `KLLSketch` compactors. Defaults to `200`.
+    """
+
+    def __init__(self, p: int = 14, k: int = 200):
+        self.p = p
+        self.k = k
+        self.columns: Dict[str, ColumnSketch] = {}
+
+    @classmethod
+    def from_frame(
+        cls, df: DataFrame, chunk_size: int = 1_000_000, p: int = 14, k: int = 200
+    ) -> "FrameSketch":
+        """Builds the sketch of a `DataFrame` processing `chunk_size` rows at a time."""
+        sketch = cls(p, k)
+        for start in range(0, max(len(df), 1), chunk_size):
+            sketch.update(df.iloc[start : start + chunk_size])
+        return sketch
+
+    def update(self, df: DataFrame) -> "FrameSketch":
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnSketch(str(df[col].dtype), self.p, self.k)
+            self.columns[col].update(df[col])
+        return self
+
+    def merge(self, other: "FrameSketch") -> "FrameSketch":
+        for col, column_sketch in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(column_sketch)
+            else:
+                self.columns[col] = column_sketch
+        return self
+
+    def summary(self, quantiles: Tuple[float, ...] = (0.25, 0.5, 0.75)) -> DataFrame:
+        """Returns one row of statistics per column."""
+        rows = []
+        for col, sketch in self.columns.items():
+            row = {
+                "column": col,
+                "dtype": sketch.dtype,
+                "rows": sketch.rows,
+                "missing": sketch.missing,
+                "unique": sketch.unique,
+                "min": sketch.min,
+                "max": sketch.max,
+            }
+            for q, value in zip(quantiles, np.atleast_1d(sketch.quantiles.quantile(quantiles))):
+                row[f"q{q:g}"] = value
+            rows.append(row)
+        return pd.DataFrame(rows)
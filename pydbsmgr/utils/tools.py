@@ -1,11 +1,19 @@
+import base64
 import concurrent.futures
+import datetime
 import glob
+import hashlib
+import importlib.util
+import io
+import json
 import os
 import random
 import re
 import sys
 from collections import Counter
-from typing import Callable, List, Tuple
+from functools import lru_cache, partial
+from typing import Callable, Iterable, List, Tuple
+from urllib.parse import quote, unquote
 
 import numpy as np
 import pandas as pd
@@ -13,11 +21,15 @@ import psutil
 import pyarrow as pa
 import pyarrow.parquet as pq
 import yaml
+from azure.core import MatchConditions
+from azure.storage.blob import BlobBlock
 from pandas.core.frame import DataFrame
+from pandas.core.series import Series
 from pyarrow import Table
 
-from pydbsmgr.main import check_if_contains_dates, is_number_regex
+from pydbsmgr.main import COLUMN_NAME_CACHE_SIZE, check_if_contains_dates, normalize_columns
 from pydbsmgr.utils.config import load_config, parse_config
+from pydbsmgr.utils.instrumentation import instrument, span
 
 
 def disableprints(func: Callable) -> Callable:
@@ -77,6 +89,19 @@ def coerce_datetime(x: str) -> np.datetime64:
         return np.datetime64("NaT")
 
 
+_PUNCTUATION = re.compile("[.,]")
+_NOT_ALLOWED = re.compile(r"[^a-zA-Z0-9ñáéíóú_]")
+_UNDERSCORES = re.compile("_+")
+
+
+@lru_cache(maxsize=COLUMN_NAME_CACHE_SIZE)
+def sql_column_name(col: str, surrounding: bool = True) -> str:
+    """Normalizes a column name to be used in SQL statements."""
+    col = _NOT_ALLOWED.sub("_", _PUNCTUATION.sub("", str(col).lower()))
+    col = _UNDERSCORES.sub("_", col).strip().rstrip("_")
+    return f"[{col}]" if surrounding else col
+
+
 class ColumnsCheck:
     """Performs checks on the columns of a DataFrame"""
 
@@ -84,26 +109,258 @@ class ColumnsCheck:
         self.df = df
 
     def get_frame(self, surrounding: bool = True) -> DataFrame:
-        return self._process_columns(surrounding)
-
-    def _process_columns(self, surrounding: bool) -> DataFrame:
-        df = self.df.copy()
-        df.columns = (
-            df.columns.str.lower()
-            .str.replace("[.,]", "", regex=True)
-            .str.replace(r"[^a-zA-Z0-9ñáéíóú_]", "_", regex=True)
-            .str.replace("_+", "_", regex=True)
-            .str.strip()
-            .str.rstrip("_")
+        """Returns a copy of the `DataFrame` with the normalized column names."""
+        return self._process_columns(surrounding, copy=True)
+
+    def get_column_mapping(self, surrounding: bool = True) -> dict:
+        """Returns the original column names with their normalized names."""
+        columns = tuple(self.df.columns)
+        return dict(
+            zip(columns, normalize_columns(columns, sql_column_name, surrounding=surrounding))
         )
-        if surrounding:
-            df.columns = [f"[{col}]" for col in df.columns]
-        return df
+
+    def _process_columns(self, surrounding: bool, copy: bool = True) -> DataFrame:
+        """Renames the columns, without `copy` the returned frame shares the data of
+        `self.df`, so it must not be modified in place."""
+        columns = normalize_columns(
+            tuple(self.df.columns), sql_column_name, surrounding=surrounding
+        )
+        return self.df.set_axis(list(columns), axis=1, copy=copy)
+
+
+def frame_to_rows(df: DataFrame) -> List[list]:
+    """Rows of a `DataFrame` as lists of Python objects, missing values become `None`.
+
+    `to_numpy(dtype=object)` keeps the `Timestamp` values, while `df.values` returns
+    nanosecond integers when every column is a datetime with `NaT` values.
+    """
+    return [
+        [
+            (
+                None
+                if (isinstance(value, float) and np.isnan(value))
+                or value is pd.NaT
+                or value is pd.NA
+                else value
+            )
+            for value in row
+        ]
+        for row in df.to_numpy(dtype=object).tolist()
+    ]
+
+
+class BlockBlobWriter(io.RawIOBase):
+    """Write-only file object that uploads its content to a block blob.
+
+    Data is buffered up to `block_size` bytes and sent with `stage_block`, the
+    blob is created by `commit_block_list` when the writer is closed. If an
+    exception is raised inside a `with` block the staged blocks are not committed.
+    """
+
+    def __init__(self, blob_client, block_size: int = 8 * 1024 * 1024, overwrite: bool = True):
+        super().__init__()
+        self._blob_client = blob_client
+        self._block_size = block_size
+        self._overwrite = overwrite
+        self._buffer = bytearray()
+        self._block_list = []
+        self._position = 0
+        self._aborted = False
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed blob writer.")
+        view = memoryview(data)
+        self._buffer += view
+        self._position += view.nbytes
+        while len(self._buffer) >= self._block_size:
+            self._stage_block(bytes(self._buffer[: self._block_size]))
+            del self._buffer[: self._block_size]
+        return view.nbytes
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if not self._aborted:
+                if self._buffer:
+                    self._stage_block(bytes(self._buffer))
+                    self._buffer.clear()
+                kwargs = {} if self._overwrite else {"match_condition": MatchConditions.IfMissing}
+                self._blob_client.commit_block_list(self._block_list, **kwargs)
+        finally:
+            super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._aborted = exc_type is not None
+        self.close()
+
+    def _stage_block(self, data: bytes) -> None:
+        block_id = base64.b64encode(f"{len(self._block_list):08d}".encode()).decode()
+        self._blob_client.stage_block(block_id=block_id, data=data, length=len(data))
+        self._block_list.append(BlobBlock(block_id=block_id))
+
+
+@instrument("write_parquet_stream")
+def write_parquet_stream(
+    sink,
+    data: DataFrame | Table,
+    row_group_size: int = 100_000,
+    compression: str | None = "snappy",
+    **kwargs,
+) -> None:
+    """Write a `DataFrame` or `Table` to `sink` one row group at a time.
+
+    Parameters
+    ----------
+    sink : file-like object
+        Destination of the parquet bytes, e.g. a `BlockBlobWriter`.
+    data : `DataFrame` | `Table`
+        The data to be written.
+    row_group_size : `int`, `optional`
+        Maximum number of rows per row group. Defaults to `100_000`.
+    compression : `str` | `None`, `optional`
+        Parquet compression codec. Defaults to `snappy`.
+
+    Keyword Arguments:
+    ----------
+    Any other option of `pyarrow.parquet.ParquetWriter`, e.g. `use_dictionary` or
+    `write_statistics`.
+    """
+    if isinstance(data, DataFrame):
+        # A `RangeIndex` cannot be described per row group, so only other indexes are stored
+        preserve_index = False if isinstance(data.index, pd.RangeIndex) else None
+        schema = pa.Schema.from_pandas(data, preserve_index=preserve_index)
+        with pq.ParquetWriter(sink, schema, compression=compression, **kwargs) as writer:
+            for start in range(0, max(len(data), 1), row_group_size):
+                chunk = data.iloc[start : start + row_group_size]
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=preserve_index)
+                )
+    else:
+        with pq.ParquetWriter(sink, data.schema, compression=compression, **kwargs) as writer:
+            writer.write_table(data, row_group_size=row_group_size)
+
+
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def get_partition_path(partition_cols: List[str], values: Tuple) -> str:
+    """Build the Hive-style `key=value/...` path of a partition."""
+    segments = []
+    for col, value in zip(partition_cols, values):
+        value = HIVE_DEFAULT_PARTITION if pd.isnull(value) else quote(str(value), safe="")
+        segments.append(f"{col}={value}")
+    return "/".join(segments)
+
+
+def parse_partition_path(path: str) -> dict:
+    """Return the `key=value` segments found in a blob path as a `dict`."""
+    partition = {}
+    for segment in path.split("/")[:-1]:
+        if "=" in segment:
+            key, value = segment.split("=", 1)
+            partition[key] = None if value == HIVE_DEFAULT_PARTITION else unquote(value)
+    return partition
+
+
+def infer_partition_type(values: Iterable[str | None]) -> pa.DataType:
+    """Type of the values of a partition key: `bool`, `int64`, `float64` or `string`.
+
+    Like `pyarrow`'s Hive partitioning, zero padded values such as `month=01` become numbers.
+    """
+    present = pa.array([value for value in values if value is not None], pa.string())
+    if len(present) == 0:
+        return pa.string()
+    if all(value.lower() in ("true", "false") for value in present.to_pylist()):
+        return pa.bool_()
+    for dtype in (pa.int64(), pa.float64()):
+        try:
+            present.cast(dtype)
+            return dtype
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return pa.string()
+
+
+def _coerce_partition_value(raw: str, sample):
+    """Converts a partition value to the type of a filter value, `ValueError` if it cannot."""
+    if sample is None or isinstance(sample, str):
+        return raw
+    if isinstance(sample, bool):
+        if raw.lower() not in ("true", "false"):
+            raise ValueError(f"Invalid boolean partition value: {raw}")
+        return raw.lower() == "true"
+    if isinstance(sample, (datetime.datetime, np.datetime64)):
+        return pd.Timestamp(raw)
+    if isinstance(sample, datetime.date):
+        return pd.Timestamp(raw).date()
+    try:
+        return type(sample)(raw)
+    except TypeError as e:
+        raise ValueError(f"Cannot compare the partition value {raw} with {sample!r}") from e
+
+
+def match_partition(partition: dict, filters: List[Tuple]) -> bool:
+    """Evaluate the filters that apply to partition keys, any other filter is ignored.
+
+    Parameters
+    ----------
+    partition : `dict`
+        The partition values as returned by `parse_partition_path`.
+    filters : `List[Tuple]`
+        Conjunction of `(column, op, value)` filters as used by `pyarrow.parquet`.
+
+    Returns
+    -------
+    `bool`
+        `True` if the partition may contain rows that satisfy the filters.
+    """
+    operators = {
+        "=": lambda x, y: x == y,
+        "==": lambda x, y: x == y,
+        "!=": lambda x, y: x != y,
+        "<": lambda x, y: x < y,
+        ">": lambda x, y: x > y,
+        "<=": lambda x, y: x <= y,
+        ">=": lambda x, y: x >= y,
+        "in": lambda x, y: x in y,
+        "not in": lambda x, y: x not in y,
+    }
+    for col, op, value in filters:
+        if col not in partition:
+            continue
+        raw = partition[col]
+        if raw is None:
+            return False
+        sample = next(iter(value), None) if op in ("in", "not in") else value
+        try:
+            raw = _coerce_partition_value(raw, sample)
+        except ValueError:
+            return op in ("!=", "not in")
+        if not operators[op](raw, value):
+            return False
+    return True
 
 
 class ControllerFeatures:
-    def __init__(self, container_client):
+    def __init__(
+        self,
+        container_client,
+        max_concurrency: int = 4,
+        block_size: int = 8 * 1024 * 1024,
+        row_group_size: int = 100_000,
+    ):
         self.container_client = container_client
+        self.max_concurrency = max_concurrency
+        self.block_size = block_size
+        self.row_group_size = row_group_size
 
     def write_pyarrow(
         self,
@@ -123,39 +380,280 @@ class ControllerFeatures:
         overwrite: bool = True,
         upload: bool = True,
     ) -> List[str] | List[bytes] | None:
-        """Write DataFrames as Parquet format by converting them to bytes first."""
+        """Write DataFrames as Parquet format, streaming row groups when uploading."""
+        if upload:
+            return self._write_tables(directory_name, dfs, names, "parquet", overwrite)
         pytables = [pa.Table.from_pandas(df) for df in dfs]
         return self._write_tables(directory_name, pytables, names, "parquet", overwrite, upload)
 
+    def write_partitioned_parquet(
+        self,
+        directory_name: str,
+        df: DataFrame,
+        partition_cols: List[str],
+        overwrite: bool = True,
+        compression: str | None = "zstd",
+        row_group_size: int | None = None,
+        use_dictionary: bool = True,
+        write_statistics: bool = True,
+        basename: str = "part-0",
+    ) -> List[str]:
+        """Write a `DataFrame` as a Hive-style partitioned Parquet dataset.
+
+        Parameters
+        ----------
+        directory_name : `str`
+            Root directory of the dataset in the container.
+        df : `DataFrame`
+            The data to be written.
+        partition_cols : `List[str]`
+            Columns used to build the `key=value` directories, they are not stored in the files.
+        overwrite : `bool`, `optional`
+            Whether to overwrite existing files. Defaults to `True`.
+        compression : `str` | `None`, `optional`
+            Parquet compression codec (e.g. `zstd`, `snappy`, `gzip`). Defaults to `zstd`.
+        row_group_size : `int` | `None`, `optional`
+            Maximum number of rows per row group. Defaults to the controller `row_group_size`.
+        use_dictionary : `bool`, `optional`
+            Whether to use dictionary encoding. Defaults to `True`.
+        write_statistics : `bool`, `optional`
+            Whether to write min/max statistics used for row group pruning. Defaults to `True`.
+        basename : `str`, `optional`
+            Name of the file written inside each partition. Defaults to `part-0`.
+
+        Returns
+        -------
+        `List[str]`
+            The names of the blobs that were written.
+        """
+        uploads = []
+        groups = df.groupby(partition_cols, dropna=False, sort=False, observed=True)
+        for values, partition_df in groups:
+            values = values if isinstance(values, tuple) else (values,)
+            partition_path = get_partition_path(partition_cols, values)
+            uploads.append(
+                (
+                    f"{directory_name}/{partition_path}/{basename}.parquet",
+                    partial(
+                        write_parquet_stream,
+                        data=partition_df.drop(columns=partition_cols).reset_index(drop=True),
+                        row_group_size=row_group_size or self.row_group_size,
+                        compression=compression,
+                        use_dictionary=use_dictionary,
+                        write_statistics=write_statistics,
+                    ),
+                )
+            )
+
+        self._upload_streams(uploads, overwrite)
+        return [blob_name for blob_name, _ in uploads]
+
+    def read_partitioned_parquet(
+        self,
+        directory_name: str,
+        filters: List[Tuple] | None = None,
+        columns: List[str] | None = None,
+        partition_schema: pa.Schema | None = None,
+    ) -> DataFrame:
+        """Read a Hive-style partitioned Parquet dataset, pruning partitions and row groups.
+
+        Parameters
+        ----------
+        directory_name : `str`
+            Root directory of the dataset in the container.
+        filters : `List[Tuple]` | `None`, `optional`
+            Conjunction of `(column, op, value)` filters. Filters on partition keys skip whole
+            files, the rest are pushed down to `pyarrow` to skip row groups. Defaults to `None`.
+        columns : `List[str]` | `None`, `optional`
+            Subset of the columns to be read, partition keys included. Defaults to `None`.
+        partition_schema : `pa.Schema` | `None`, `optional`
+            Types of the partition keys. The keys that are not in it are typed with
+            `infer_partition_type`. Defaults to `None`.
+
+        Returns
+        -------
+        `DataFrame`
+            The rows that satisfy the filters, with the partition keys as columns.
+        """
+        filters = filters or []
+        parts = []
+        for blob in self.container_client.list_blobs(name_starts_with=directory_name + "/"):
+            if not blob.name.endswith(".parquet"):
+                continue
+            partition = parse_partition_path(blob.name[len(directory_name) + 1 :])
+            if not match_partition(partition, filters):
+                continue
+            row_filters = [f for f in filters if f[0] not in partition]
+            stored_columns = columns and [col for col in columns if col not in partition]
+            with io.BytesIO(self.container_client.download_blob(blob.name).readall()) as bytes_io:
+                table = pq.read_table(bytes_io, columns=stored_columns, filters=row_filters or None)
+            parts.append((table, partition))
+
+        if not parts:
+            return DataFrame(columns=columns)
+
+        keys = {key: [] for _, partition in parts for key in partition}
+        for _, partition in parts:
+            for key in keys:
+                keys[key].append(partition.get(key))
+        types = {
+            key: (
+                partition_schema.field(key).type
+                if partition_schema is not None and key in partition_schema.names
+                else infer_partition_type(values)
+            )
+            for key, values in keys.items()
+        }
+
+        tables = []
+        for table, partition in parts:
+            for key, value in partition.items():
+                if columns is None or key in columns:
+                    values = pa.array([value] * table.num_rows, pa.string())
+                    table = table.append_column(key, values.cast(types[key]))
+            if columns is not None:
+                table = table.select([col for col in columns if col in table.column_names])
+            tables.append(table)
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    def get_changed_blobs(
+        self,
+        directory_name: str,
+        manifest_path: str = "./blob_manifest.json",
+        recursive: bool = False,
+        commit: bool = False,
+    ) -> List:
+        """Return the blobs of a directory that were added or changed since the last run.
+
+        The `ETag` and last-modified date of every blob are kept in a `.json` manifest per
+        directory. The result is also stored in `file_list`, so it can be read with
+        `manual_mode=True` in `get_parquet`/`get_excel_csv`. Call `commit_manifest` once the
+        blobs have been processed, otherwise they are returned again by the next call.
+
+        Parameters
+        ----------
+        directory_name : `str`
+            The directory to be synchronized.
+        manifest_path : `str`, `optional`
+            Path of the local manifest file. Defaults to `./blob_manifest.json`.
+        recursive : `bool`, `optional`
+            Whether to include blobs of subdirectories. Defaults to `False`.
+        commit : `bool`, `optional`
+            Whether to write the manifest right away instead of waiting for
+            `commit_manifest`. Defaults to `False`.
+
+        Returns
+        -------
+        `List[BlobProperties]`
+            The new or changed blobs sorted by name.
+        """
+        prefix = directory_name.rstrip("/") + "/"
+        manifest = self._load_manifest(manifest_path)
+        previous = manifest.get(prefix, {}).get("blobs", {})
+
+        current, changed = {}, []
+        for blob in self.container_client.list_blobs(name_starts_with=prefix):
+            if not recursive and "/" in blob.name[len(prefix) :]:
+                continue
+            state = {"etag": blob.etag, "last_modified": blob.last_modified.isoformat()}
+            current[blob.name] = state
+            if previous.get(blob.name) != state:
+                changed.append(blob)
+
+        if not hasattr(self, "_pending_manifest"):
+            self._pending_manifest = {}
+        self._pending_manifest.setdefault(manifest_path, {})[prefix] = {"blobs": current}
+        if commit:
+            self.commit_manifest(directory_name)
+
+        self.file_list = sorted(changed, key=lambda blob: blob.name)
+        return self.file_list
+
+    def commit_manifest(self, directory_name: str | None = None) -> None:
+        """Write the manifest entries computed by `get_changed_blobs` since the last commit.
+
+        Parameters
+        ----------
+        directory_name : `str` | `None`, `optional`
+            Only commit the entry of this directory. Defaults to `None`, all the directories.
+        """
+        pending = getattr(self, "_pending_manifest", {})
+        for manifest_path, entries in list(pending.items()):
+            if directory_name is not None:
+                prefix = directory_name.rstrip("/") + "/"
+                entries = {prefix: entries[prefix]} if prefix in entries else {}
+            if not entries:
+                continue
+            manifest = self._load_manifest(manifest_path)
+            manifest.update(entries)
+            with open(manifest_path, "w") as file:
+                json.dump(manifest, file, indent=2)
+            for prefix in list(entries):
+                del pending[manifest_path][prefix]
+            if not pending[manifest_path]:
+                del pending[manifest_path]
+
+    def _load_manifest(self, manifest_path: str) -> dict:
+        if not os.path.isfile(manifest_path):
+            return {}
+        with open(manifest_path, "r") as file:
+            return json.load(file)
+
     def _write_tables(
         self,
         directory_name: str,
-        tables: List[Table],
+        tables: List[Table] | List[DataFrame],
         names: List[str],
         format_type: str,
         overwrite: bool = True,
         upload: bool = True,
     ) -> List[str] | List[bytes] | None:
-        files_not_loaded, collected_files = [], []
+        files_not_loaded, collected_files, uploads = [], [], []
         for table, blob_name in zip(tables, names):
             if table is not None:
-                buf = pa.BufferOutputStream()
-                pq.write_table(table, buf)
-                parquet_data = buf.getvalue().to_pybytes()
                 blob_path_name = os.path.join(directory_name, f"{blob_name}.{format_type}")
                 if upload:
-                    self.container_client.upload_blob(
-                        name=blob_path_name,
-                        data=parquet_data,
-                        overwrite=overwrite,
+                    uploads.append(
+                        (
+                            blob_path_name,
+                            partial(
+                                write_parquet_stream,
+                                data=table,
+                                row_group_size=self.row_group_size,
+                            ),
+                        )
                     )
                 else:
-                    collected_files.append(parquet_data)
+                    buf = pa.BufferOutputStream()
+                    pq.write_table(table, buf)
+                    collected_files.append(buf.getvalue().to_pybytes())
             else:
                 files_not_loaded.append(blob_name)
 
+        self._upload_streams(uploads, overwrite)
         return files_not_loaded or (collected_files if not upload else None)
 
+    def _upload_streams(
+        self, uploads: List[Tuple[str, Callable[[BlockBlobWriter], None]]], overwrite: bool = True
+    ) -> None:
+        """Upload several blobs concurrently, each one written by its own callable."""
+
+        def upload_stream(blob_name: str, write_fn: Callable[[BlockBlobWriter], None]) -> None:
+            blob_client = self.container_client.get_blob_client(blob_name)
+            with span("upload_blob") as upload_span:
+                with BlockBlobWriter(blob_client, self.block_size, overwrite) as sink:
+                    write_fn(sink)
+                upload_span.add(bytes=sink.tell())
+
+        if not uploads:
+            return
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(uploads))
+        ) as executor:
+            futures = [executor.submit(upload_stream, *upload) for upload in uploads]
+            for future in futures:
+                future.result()
+
 
 def column_coincidence(df1: DataFrame, df2: DataFrame) -> float:
     """Return the percentage of coincident columns between two pandas DataFrames."""
@@ -168,6 +666,255 @@ def column_coincidence(df1: DataFrame, df2: DataFrame) -> float:
     return len(common_columns) / len(total_columns)
 
 
+def table_from_frame(df: DataFrame) -> Table:
+    """Convert a `DataFrame` to a `Table`, the mixed type `object` columns that Arrow cannot
+    convert are stored as `str`."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy(deep=False)
+        for position, dtype in enumerate(df.dtypes):
+            if dtype != "object":
+                continue
+            values = df.iloc[:, position]
+            try:
+                pa.array(values, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df.isetitem(position, values.where(values.isna(), values.astype(str)))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _hash_values(values) -> np.ndarray:
+    """64-bit hash of every value of a pandas or `polars` `Series`.
+
+    pandas values that cannot be hashed (e.g. `list`) are hashed through their `str`.
+    """
+    if not isinstance(values, Series):
+        return values.hash(seed=0).to_numpy()
+    try:
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+    except TypeError:
+        return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+
+
+def _hash_rows(df) -> np.ndarray:
+    """64-bit hash of every row of a pandas or `polars` `DataFrame`."""
+    if not isinstance(df, DataFrame):
+        return df.hash_rows(seed=0).to_numpy()
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        hashes = [_hash_values(df.iloc[:, position]) for position in range(df.shape[1])]
+        return pd.util.hash_pandas_object(pd.DataFrame(hashes).T, index=False).to_numpy()
+
+
+def _columns(df) -> List:
+    """The columns of a pandas or `polars` `DataFrame` as a list of `Series`, by position."""
+    if isinstance(df, DataFrame):
+        return [df.iloc[:, position] for position in range(df.shape[1])]
+    return df.get_columns()
+
+
+def _equal_values(a, b) -> np.ndarray:
+    """Element-wise equality of two aligned `Series`, where two missing values are equal."""
+    if not isinstance(a, Series):
+        return a.eq_missing(b).to_numpy()
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    equal = pd.array(a == b).to_numpy(dtype=bool, na_value=False)
+    return equal | (a.isna() & b.isna()).to_numpy()
+
+
+def _same_column(a, b) -> bool:
+    if isinstance(a, Series):
+        return a.equals(b)
+    return a.equals(b, check_dtypes=True)
+
+
+def column_fingerprints(df: DataFrame) -> List[bytes]:
+    """One 64-bit fingerprint per column, built from the hashes of its values.
+
+    Columns with the same values and dtype get the same fingerprint. Both pandas and `polars`
+    dataframes are supported, pandas columns holding unhashable objects (e.g. `list`) are
+    hashed through their `str` representation.
+    """
+    fingerprints = []
+    for values in _columns(df):
+        digest = hashlib.blake2b(_hash_values(values).tobytes(), digest_size=8)
+        digest.update(str(values.dtype).encode())
+        fingerprints.append(digest.digest())
+    return fingerprints
+
+
+def duplicated_columns(df: DataFrame) -> np.ndarray:
+    """Boolean mask of the columns whose content repeats an earlier column.
+
+    Candidates are found by their fingerprint and confirmed with `Series.equals`, so a hash
+    collision never drops a column. This replaces `df.T.drop_duplicates().T`, which converts
+    the whole `DataFrame` to `object` twice. `polars` dataframes are also supported.
+    """
+    columns = _columns(df)
+    mask = np.zeros(len(columns), dtype=bool)
+    first_positions = {}
+    for position, fingerprint in enumerate(column_fingerprints(df)):
+        candidates = first_positions.setdefault(fingerprint, [])
+        values = columns[position]
+        if any(_same_column(values, columns[first]) for first in candidates):
+            mask[position] = True
+        else:
+            candidates.append(position)
+    return mask
+
+
+def drop_duplicate_columns(df: DataFrame) -> DataFrame:
+    """Removes the columns whose content repeats an earlier column, see `duplicated_columns`."""
+    mask = duplicated_columns(df)
+    if not mask.any():
+        return df
+    if isinstance(df, DataFrame):
+        return df.iloc[:, ~mask]
+    return df.select([col for col, duplicated in zip(df.columns, mask) if not duplicated])
+
+
+def duplicated_rows(
+    df: DataFrame, subset: List[str] | None = None, keep: str = "first"
+) -> np.ndarray:
+    """Boolean mask of the rows that repeat another row, like `DataFrame.duplicated`.
+
+    Each row is reduced to a 64-bit hash, the rows whose hash was already seen are the
+    candidates and every candidate is compared with the row it would repeat. A hash collision
+    can therefore only keep a row, never drop one. Unlike `DataFrame.duplicated`, columns
+    holding unhashable objects (e.g. `list`) are supported.
+
+    Parameters
+    ----------
+    df : `DataFrame`
+        A pandas or `polars` `DataFrame`.
+    subset : `List[str]` | `None`, `optional`
+        Only these columns are compared. Defaults to `None`, all the columns.
+    keep : `str`, `optional`
+        `first` marks every occurrence but the first one, `last` every occurrence but the
+        last one. Defaults to `first`.
+
+    Returns
+    -------
+    `np.ndarray`
+        One boolean per row.
+    """
+    if keep not in ("first", "last"):
+        raise ValueError(f"Invalid value for keep: {keep}, choose from ['first', 'last']")
+    if subset is not None:
+        df = df[subset] if isinstance(df, DataFrame) else df.select(subset)
+    if len(df) == 0 or df.shape[1] == 0:
+        return np.zeros(len(df), dtype=bool)
+
+    hashes = _hash_rows(df)
+    if keep == "last":
+        hashes = hashes[::-1]
+    # `factorize` numbers the hashes by first appearance, so a new code is a kept row
+    codes = pd.factorize(hashes)[0]
+    kept = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+    candidates = np.flatnonzero(kept[codes] != np.arange(len(codes)))
+    references = kept[codes[candidates]]
+    if keep == "last":
+        candidates, references = len(codes) - 1 - candidates, len(codes) - 1 - references
+    if candidates.size == 0:
+        return np.zeros(len(df), dtype=bool)
+
+    confirmed = np.ones(candidates.size, dtype=bool)
+    for values in _columns(df):
+        if isinstance(values, Series):
+            a, b = values.iloc[candidates], values.iloc[references]
+        else:
+            a, b = values.gather(candidates), values.gather(references)
+        confirmed &= _equal_values(a, b)
+
+    mask = np.zeros(len(df), dtype=bool)
+    mask[candidates[confirmed]] = True
+    return mask
+
+
+def drop_duplicate_rows(df: DataFrame, subset: List[str] | None = None, keep: str = "first"):
+    """Removes the rows that repeat another row, see `duplicated_rows`.
+
+    The index of a pandas `DataFrame` is kept as is.
+    """
+    mask = duplicated_rows(df, subset, keep)
+    if not mask.any():
+        return df
+    if isinstance(df, DataFrame):
+        return df[~mask]
+    return df[np.flatnonzero(~mask)]
+
+
+@instrument("concat_frames")
+def concat_frames(dfs: Iterable[DataFrame], ignore_index: bool = True) -> DataFrame:
+    """Concatenate dataframes vertically, like `pd.concat(dfs, ignore_index=ignore_index)`.
+
+    While the dataframes share the same `str` column labels, dtypes and index layout, each one is
+    converted to a `Table` as it is consumed, so a generator that releases its sources keeps
+    only one pandas copy alive. `pa.concat_tables` does not copy the data and the conversion
+    back to pandas frees the Arrow buffers column by column. Otherwise, or when Arrow cannot
+    convert a column, the dataframes are concatenated with `pd.concat`.
+
+    Parameters
+    ----------
+    dfs : `Iterable[DataFrame]`
+        The dataframes to be concatenated.
+    ignore_index : `bool`, `optional`
+        Whether to replace the indexes of the dataframes by a new `RangeIndex`, otherwise
+        they are kept (through Arrow as index columns). Defaults to `True`.
+
+    Returns
+    -------
+    `DataFrame`
+        The concatenated `DataFrame`.
+    """
+    dfs = iter(dfs)
+    tables = []
+    first = None
+    for df in dfs:
+        if first is None:
+            first = df
+        if _same_arrow_layout(df, first, ignore_index):
+            try:
+                tables.append(pa.Table.from_pandas(df, preserve_index=not ignore_index))
+                continue
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                pass
+        frames = [table.to_pandas() for table in tables] + [df, *dfs]
+        return pd.concat(frames, ignore_index=ignore_index)
+
+    if first is None:
+        raise ValueError("No objects to concatenate")
+    try:
+        # Only all-null columns are promoted, e.g. an `object` column of `None`
+        table = pa.concat_tables(tables, promote_options="default")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pd.concat([table.to_pandas() for table in tables], ignore_index=ignore_index)
+    del tables
+    return table.to_pandas(self_destruct=True, split_blocks=True)
+
+
+def _same_arrow_layout(df: DataFrame, first: DataFrame, ignore_index: bool = True) -> bool:
+    """Whether `df` can join the Arrow concatenation started with `first`, i.e. the result
+    equals `pd.concat`."""
+    same_index = ignore_index or (
+        df.index.names == first.index.names
+        and all(a == b for a, b in zip(_index_dtypes(df.index), _index_dtypes(first.index)))
+    )
+    return (
+        same_index
+        and df.columns.is_unique
+        and all(isinstance(col, str) for col in df.columns)
+        and df.columns.equals(first.columns)
+        and all(a == b for a, b in zip(df.dtypes, first.dtypes))
+    )
+
+
+def _index_dtypes(index: pd.Index) -> list:
+    return list(index.dtypes) if isinstance(index, pd.MultiIndex) else [index.dtype]
+
+
 def merge_by_coincidence(df1: DataFrame, df2: DataFrame, tol: float = 0.9) -> DataFrame:
     """Merge two pandas DataFrames by finding the most similar columns based on their names."""
     percentage = column_coincidence(df1, df2)
@@ -177,8 +924,8 @@ def merge_by_coincidence(df1: DataFrame, df2: DataFrame, tol: float = 0.9) -> Da
             f"{set(df1.columns).union(set(df2.columns)) - set(df1.columns).intersection(set(df2.columns))}"
         )
 
-    common_cols = set(df1.columns).intersection(set(df2.columns))
-    df_combined = pd.concat([df1[common_cols], df2[common_cols]], ignore_index=True)
+    common_cols = [col for col in df1.columns if col in set(df2.columns)]
+    df_combined = concat_frames([df1[common_cols], df2[common_cols]])
 
     return df_combined
 
@@ -231,49 +978,119 @@ def get_extraction_date(
     return sub_extraction_date(filename)
 
 
+def _is_text(values: Series) -> bool:
+    return values.dtype == object or isinstance(values.dtype, pd.StringDtype)
+
+
+def numeric_ratio(
+    values: Series, sample_frac: float = 0.1, min_rows: int = 1000, random_state: int = 0
+) -> float:
+    """Ratio of the sampled non-missing values that `pd.to_numeric` can parse.
+
+    Parameters
+    ----------
+    values : `Series`
+        The column to check.
+    sample_frac : `float`, `optional`
+        Fraction of the rows sampled. Defaults to `0.1`.
+    min_rows : `int`, `optional`
+        Minimum number of sampled values, short columns are checked whole. Defaults to `1000`.
+    random_state : `int`, `optional`
+        Seed of the sample. Defaults to `0`.
+
+    Returns
+    -------
+    `float`
+        Between `0` and `1`, `0` for a column without values.
+    """
+    present = values.dropna()
+    n = min(len(present), max(int(len(values) * sample_frac), min_rows))
+    if n == 0:
+        return 0.0
+    if n < len(present):
+        present = present.sample(n, random_state=random_state)
+    if pd.api.types.infer_dtype(present, skipna=True) == "boolean":
+        return 0.0
+    return float(pd.to_numeric(present, errors="coerce").notna().mean())
+
+
+def to_nullable_numeric(values: Series) -> Series:
+    """Converts a column with a single `pd.to_numeric` call, values that cannot be parsed
+    become missing.
+
+    The result is `Int64` when every value is a whole number in the `int64` range (e.g.
+    `"3"` or `"3.0"`), otherwise `Float64`. Larger integers are kept as `UInt64`.
+    """
+    numbers = pd.to_numeric(values, errors="coerce", dtype_backend="numpy_nullable")
+    if numbers.dtype == "Int64" or not pd.api.types.is_numeric_dtype(numbers):
+        return numbers
+    present = numbers.dropna()
+    if pd.api.types.is_integer_dtype(numbers):
+        fits = present.empty or present.max() <= np.iinfo(np.int64).max
+        return numbers.astype("Int64") if fits else numbers
+    present = present.to_numpy(dtype=np.float64)
+    whole = np.all(np.mod(present, 1) == 0) and np.all(np.abs(present) < 2.0**63)
+    return numbers.astype("Int64" if whole else "Float64")
+
+
 class ColumnsDtypes:
     """Convert all columns to specified dtype."""
 
     def __init__(self, df_: DataFrame):
         self.df = df_.copy()
+        self.memory_report = None
 
+    @instrument("ColumnsDtypes.correct")
     def correct(
         self,
         drop_values: bool = False,
         drop_rows: bool = False,
         sample_frac: float = 0.1,
+        downcast: bool = False,
+        numeric_threshold: float = 0.9,
     ) -> DataFrame:
-        self._check_int_float(drop_values, drop_rows)
+        """Converts the numeric and date columns, `downcast` then applies `downcast_frame`
+        and keeps its report in `memory_report` (`None` otherwise).
+
+        A text column is numeric when at least `numeric_threshold` of a `sample_frac` sample
+        of its values are numbers, see `numeric_ratio`. It is then converted whole to `Int64`
+        or `Float64`, the values that are not numbers become missing. `drop_values` removes
+        the rows of those values and `drop_rows` every row with missing values."""
+        self._check_int_float(drop_values, drop_rows, sample_frac, numeric_threshold)
         self._check_datetime(sample_frac)
+        if downcast:
+            self.df, self.memory_report = downcast_frame(self.df)
         return self.df
 
     def get_frame(self) -> DataFrame:
         return self.df
 
-    def _check_int_float(self, drop_values: bool, drop_rows: bool) -> None:
+    def _check_int_float(
+        self,
+        drop_values: bool,
+        drop_rows: bool,
+        sample_frac: float = 0.1,
+        numeric_threshold: float = 0.9,
+    ) -> None:
         """Check and correct the data types of columns in a `DataFrame`."""
+        lost = np.zeros(len(self.df), dtype=bool)
+        for col in self.df.columns:
+            values = self.df[col]
+            if not _is_text(values) or numeric_ratio(values, sample_frac) < numeric_threshold:
+                continue
+            numbers = to_nullable_numeric(values)
+            lost_values = (numbers.isna() & values.notna()).to_numpy()
+            self.df[col] = numbers
+            print(f"Successfully transformed the '{col}' column into {numbers.dtype}.")
+            if lost_values.any():
+                print(
+                    f"UserWarning: {lost_values.sum()} values of the '{col}' column are not "
+                    "numeric, they have been replaced by missing values."
+                )
+            lost |= lost_values
 
-        def check_value(value):
-            try:
-                if float(value).is_integer():
-                    return int(value)
-                return float(value)
-            except ValueError:
-                return np.nan
-
-        if len(self.df) < 1e5 or not drop_values:
-            for col in self.df.columns:
-                value = str(self.df[col].iloc[0])
-                if is_number_regex(value):
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        self.df[col] = list(executor.map(check_value, self.df[col]))
-                    try:
-                        self.df[col] = pd.to_numeric(self.df[col], errors="coerce")
-                        print(f"Successfully transformed the '{col}' column into numeric.")
-                    except ValueError:
-                        self.df[col] = self.df[col].astype("object")
-                        print(f"Failed to transform the '{col}' column, setting to object.")
-
+        if drop_values and lost.any():
+            self.df = self.df[~lost]
         if drop_rows:
             self.df.dropna(inplace=True)
 
@@ -291,6 +1108,184 @@ class ColumnsDtypes:
                         print(f"Failed to transform the '{col}' column into datetime.")
 
 
+def _smallest_int_dtype(min_value, max_value, nullable: bool) -> str | None:
+    """Smallest integer dtype holding the range, `uint8` is preferred for small non-negative
+    values since it maps to `TINYINT`."""
+    for dtype in ["uint8", "int8", "int16", "int32", "int64"]:
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return dtype.capitalize().replace("Uint", "UInt") if nullable else dtype
+    return None
+
+
+def downcast_series(
+    values: Series, categorical_threshold: float = 0.5, whole_floats_to_int: bool = False
+) -> Series:
+    """Returns `values` with the smallest dtype that keeps every value.
+
+    Parameters
+    ----------
+    values : `Series`
+        The column to downcast.
+    categorical_threshold : `float`, `optional`
+        Text columns with at most this ratio of distinct values to rows become `category`,
+        the others become Arrow backed `string`. Defaults to `0.5`.
+    whole_floats_to_int : `bool`, `optional`
+        Floats holding only whole numbers become nullable integers. A later chunk with
+        decimals then no longer fits the table created from them, so it is only meant for
+        complete data. Defaults to `False`.
+
+    Returns
+    -------
+    `Series`
+        Integers get the smallest (nullable when there are missing values) integer dtype and
+        floats `float32` (`Float32` when nullable) when it is exact. Booleans, dates and mixed
+        object columns are returned as they are.
+    """
+    if pd.api.types.is_bool_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    if pd.api.types.is_integer_dtype(values):
+        if values.isna().all():
+            return values
+        dtype = _smallest_int_dtype(values.min(), values.max(), values.hasnans)
+        return values.astype(dtype) if dtype else values
+    if pd.api.types.is_float_dtype(values):
+        present = values.dropna().to_numpy(dtype=np.float64)
+        if present.size == 0:
+            return values
+        if whole_floats_to_int and np.all(np.mod(present, 1) == 0):
+            dtype = _smallest_int_dtype(present.min(), present.max(), True)
+            if dtype:
+                return values.astype(dtype)
+        nullable = isinstance(values.dtype, pd.api.extensions.ExtensionDtype)
+        float32 = "Float32" if nullable else np.float32
+        if values.dtype != float32:
+            as_float32 = values.astype(float32)
+            if np.array_equal(
+                as_float32.to_numpy(np.float64, na_value=np.nan),
+                values.to_numpy(np.float64, na_value=np.nan),
+                equal_nan=True,
+            ):
+                return as_float32
+        return values
+    if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == "string":
+        if values.nunique() <= categorical_threshold * len(values):
+            return values.astype("category")
+        return values.astype("string[pyarrow]")
+    return values
+
+
+def downcast_frame(
+    df: DataFrame, categorical_threshold: float = 0.5, whole_floats_to_int: bool = False
+) -> Tuple[DataFrame, DataFrame]:
+    """Applies `downcast_series` to every column.
+
+    Returns
+    -------
+    df, report : `Tuple[DataFrame, DataFrame]`
+        The downcasted `DataFrame` and one row per column with the dtypes and the memory in
+        bytes before and after.
+    """
+    columns = {}
+    rows = []
+    for position, col in enumerate(df.columns):
+        values = df.iloc[:, position]
+        downcasted = downcast_series(values, categorical_threshold, whole_floats_to_int)
+        columns[position] = downcasted
+        before = values.memory_usage(index=False, deep=True)
+        after = downcasted.memory_usage(index=False, deep=True)
+        rows.append(
+            {
+                "column": col,
+                "dtype": str(values.dtype),
+                "new dtype": str(downcasted.dtype),
+                "memory": before,
+                "new memory": after,
+                "saving %": round(100 * (1 - after / before), 2) if before else 0.0,
+            }
+        )
+    result = pd.concat(columns, axis=1) if columns else df.copy()
+    result.columns = df.columns
+    result.index = df.index
+    return result, pd.DataFrame(rows)
+
+
+EXCEL_PARALLEL_MIN_BYTES = 1024 * 1024
+
+
+def get_excel_engine(engine: str = "auto") -> str:
+    """Resolve the Excel reader backend.
+
+    `auto` prefers `calamine` (Rust based, requires `python-calamine`) and falls back to
+    `openpyxl`, which pandas opens in `read_only` streaming mode.
+    """
+    if engine == "auto":
+        return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+    return engine
+
+
+def read_excel_sheet(source: str | bytes, sheet_name: str, engine: str = "auto") -> DataFrame:
+    """Read a single sheet of a workbook given as a path or as `bytes`."""
+    workbook = io.BytesIO(source) if isinstance(source, bytes) else source
+    return pd.read_excel(
+        workbook, sheet_name=sheet_name, index_col=None, engine=get_excel_engine(engine)
+    )
+
+
+@instrument("read_excel_sheets")
+def read_excel_sheets(
+    source: str | bytes,
+    sheet_names: List[str] | None = None,
+    engine: str = "auto",
+    max_workers: int | None = 1,
+) -> dict:
+    """Read the sheets of a workbook, in parallel processes when asked to and worth it.
+
+    Parameters
+    ----------
+    source : `str` | `bytes`
+        Path of the workbook or its content.
+    sheet_names : `List[str]` | `None`, `optional`
+        The sheets to be read. Defaults to all sheets.
+    engine : `str`, `optional`
+        `calamine`, `openpyxl` or `auto`. Defaults to `auto`.
+    max_workers : `int` | `None`, `optional`
+        Maximum number of worker processes, `None` uses one per CPU. Each worker receives the
+        workbook and parses it again, and the caller needs an `if __name__ == "__main__"`
+        guard on platforms that spawn processes. Workbooks smaller than
+        `EXCEL_PARALLEL_MIN_BYTES` are always read sequentially. Defaults to `1`, no worker
+        processes.
+
+    Returns
+    -------
+    `dict`
+        The sheet names with their `DataFrame`, in workbook order.
+    """
+    engine = get_excel_engine(engine)
+    if sheet_names is None:
+        workbook = io.BytesIO(source) if isinstance(source, bytes) else source
+        with pd.ExcelFile(workbook, engine=engine) as excel_file:
+            sheet_names = excel_file.sheet_names
+
+    size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    if len(sheet_names) > 1 and max_workers != 1 and size >= EXCEL_PARALLEL_MIN_BYTES:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(max_workers or os.cpu_count(), len(sheet_names))
+        ) as executor:
+            frames = list(
+                executor.map(
+                    read_excel_sheet,
+                    [source] * len(sheet_names),
+                    sheet_names,
+                    [engine] * len(sheet_names),
+                )
+            )
+    else:
+        frames = [read_excel_sheet(source, sheet_name, engine) for sheet_name in sheet_names]
+
+    return dict(zip(sheet_names, frames))
+
+
 def create_directory(data, parent_path=""):
     """Creates the directory tree from a `yaml` file."""
     for key, value in data.items():
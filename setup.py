@@ -32,6 +32,7 @@ setuptools.setup(
     license="MIT",
     packages=setuptools.find_packages(exclude=["*.tests", "*.tests.*", "tests.*", "tests"]),
     install_requires=install_requires,
+    extras_require={"async": ["aiohttp"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -1,3 +1,5 @@
+import datetime
+from types import SimpleNamespace
 from typing import Callable
 
 import pandas as pd
@@ -5,7 +7,122 @@ import pytest
 
 from pydbsmgr.lightest import LightCleaner
 from pydbsmgr.main import *
-from pydbsmgr.utils.tools import ColumnsCheck, ColumnsDtypes, get_extraction_date
+from pydbsmgr.utils.tools import (
+    ColumnsCheck,
+    ColumnsDtypes,
+    ControllerFeatures,
+    get_extraction_date,
+)
+
+
+class InMemoryBlobClient:
+    """Minimal stand-in of `BlobClient` that keeps staged and committed blocks in memory."""
+
+    def __init__(self, container, name):
+        self._container = container
+        self.name = name
+        self._staged = {}
+
+    def stage_block(self, block_id, data, length=None, **kwargs):
+        self._staged[block_id] = bytes(data)
+
+    def commit_block_list(self, block_list, **kwargs):
+        if kwargs.get("match_condition") is not None and self.name in self._container.blobs:
+            raise FileExistsError(self.name)
+        self._container.blocks[self.name] = [self._staged[block.id] for block in block_list]
+        self._container.blobs[self.name] = b"".join(self._container.blocks[self.name])
+        self._container.properties[self.name] = SimpleNamespace(
+            name=self.name,
+            etag=f"0x{len(self._container.properties) + 1:X}-{hash(self._container.blobs[self.name])}",
+            last_modified=datetime.datetime.now(),
+        )
+
+
+class InMemoryContainerClient:
+    """Minimal stand-in of `ContainerClient` used to test the upload engine."""
+
+    def __init__(self):
+        self.blobs = {}
+        self.blocks = {}
+        self.properties = {}
+
+    def get_blob_client(self, blob):
+        return InMemoryBlobClient(self, blob)
+
+    def list_blobs(self, name_starts_with=None, **kwargs):
+        return [
+            self.properties[name]
+            for name in sorted(self.blobs)
+            if name.startswith(name_starts_with or "")
+        ]
+
+    def download_blob(self, blob, **kwargs):
+        return SimpleNamespace(readall=lambda: self.blobs[blob])
+
+
+class AsyncInMemoryContainerClient:
+    """Minimal stand-in of the `aio` `ContainerClient`, backed by an `InMemoryContainerClient`."""
+
+    def __init__(self, container):
+        self._container = container
+
+    async def walk_blobs(self, name_starts_with=None, delimiter=None):
+        for blob in self._container.list_blobs(name_starts_with):
+            if delimiter is None or delimiter not in blob.name[len(name_starts_with or "") :]:
+                yield _AsyncBlob(blob.name)
+
+    async def download_blob(self, blob, **kwargs):
+        data = self._container.blobs[blob]
+
+        async def readall():
+            return data
+
+        return SimpleNamespace(readall=readall)
+
+    async def upload_blob(self, name, data, overwrite=False, **kwargs):
+        if not overwrite and name in self._container.blobs:
+            raise FileExistsError(name)
+        self._container.blobs[name] = bytes(data)
+        self._container.properties[name] = SimpleNamespace(
+            name=name, etag=str(len(self._container.properties)), last_modified=None
+        )
+
+
+class _AsyncBlob(dict):
+    """Blob properties readable both as `blob.name` and `blob["name"]`."""
+
+    def __init__(self, name):
+        super().__init__(name=name)
+        self.name = name
+
+
+class AsyncInMemoryBlobServiceClient:
+    """Minimal stand-in of the `aio` `BlobServiceClient`."""
+
+    container = None
+
+    def __init__(self):
+        self.closed = False
+
+    @classmethod
+    def from_connection_string(cls, connection_string, **kwargs):
+        return cls()
+
+    def get_container_client(self, container_name):
+        return AsyncInMemoryContainerClient(self.container)
+
+    async def __aenter__(self):
+        return self
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture()
+def in_memory_controller() -> ControllerFeatures:
+    return ControllerFeatures(
+        InMemoryContainerClient(), max_concurrency=2, block_size=1024, row_group_size=500
+    )
 
 
 @pytest.fixture()
@@ -48,6 +165,16 @@ def _correct_nan() -> Callable:
     return correct_nan
 
 
+@pytest.fixture()
+def _drop_empty_columns() -> Callable:
+    return drop_empty_columns
+
+
+@pytest.fixture()
+def _intersection_cols() -> Callable:
+    return intersection_cols
+
+
 @pytest.fixture()
 def columns_dtypes_with_data() -> Callable:
     """Passes a test dataframe to the class"""
@@ -108,3 +235,22 @@ def columns_check_with_data() -> Callable:
     df = handler.get_frame(surrounding=False)
 
     return df.columns.to_list()
+
+
+@pytest.fixture()
+def health(tmp_path, monkeypatch):
+    """Imports `pydbsmgr.health` from a temporary directory, it creates log files on import."""
+    monkeypatch.chdir(tmp_path)
+    import pydbsmgr.health
+
+    return pydbsmgr.health
+
+
+@pytest.fixture()
+def async_controller(monkeypatch):
+    """`AsyncStorageController` whose async client keeps the blobs in memory."""
+    from pydbsmgr.utils import azure_sdk
+
+    monkeypatch.setattr(AsyncInMemoryBlobServiceClient, "container", InMemoryContainerClient())
+    monkeypatch.setattr(azure_sdk, "AsyncBlobServiceClient", AsyncInMemoryBlobServiceClient)
+    return azure_sdk.AsyncStorageController("connection string", "container", max_concurrency=2)
@@ -1,14 +1,28 @@
+import gc
+import importlib.util
+import json
+import os
 import re
+import subprocess
 import sys
+import weakref
+from io import BytesIO
 from typing import List, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from pandas.core.frame import DataFrame
 from pandas.core.indexes.base import Index
 from pandas.core.series import Series
 
+from pydbsmgr.logs import EventLogBook, EventLogger
+from pydbsmgr.main import normalize_columns
+from pydbsmgr.utils import tools
+from pydbsmgr.utils.sketches import FrameSketch
+
 
 def test_clean(_clean):
     assert _clean("#Tes$ting method*") == "testing method"
@@ -48,6 +62,35 @@ def test_columns_dtypes(columns_dtypes_with_data):
     assert data_types.iloc[1] == "datetime64[ns]"
 
 
+def test_columns_dtypes_numeric():
+    df = pd.DataFrame(
+        {
+            "int": ["1", " 2 ", None, "4"],
+            "whole": ["1.0", "2.0", np.nan, "3"],
+            "float": ["1.5", "2", None, "3"],
+            "mixed": ["1.5", "2", None, "x"],
+            "flag": [True, False, True, None],
+            "text": ["a", "b", "c", "d"],
+        }
+    )
+    columns_dtypes = tools.ColumnsDtypes(df)
+    assert columns_dtypes.memory_report is None
+    dtypes = columns_dtypes.correct(sample_frac=1.0, numeric_threshold=0.5).dtypes
+    assert dtypes.astype(str).to_list() == [
+        "Int64",
+        "Int64",
+        "Float64",
+        "Float64",
+        "object",
+        "object",
+    ]
+
+    df = tools.ColumnsDtypes(df).correct(drop_values=True, numeric_threshold=0.5)
+    assert df["mixed"].dtype == "Float64"
+    assert df["mixed"].isna().to_list() == [False, False, True]
+    assert tools.numeric_ratio(df["text"]) == 0.0
+
+
 def test_lightest(lightest_with_data):
     fecha, first_date, anther_date, third_date = lightest_with_data
     comparison = ["1974-09-10", "1973-01-06", "1975-01-18", "2020-08-25", "NaT"]
@@ -69,3 +112,766 @@ def test_columnscheck(columns_check_with_data):
 def test_get_extraction_date(_get_extraction_date):
     assert _get_extraction_date("filename_2023-11-17") == "2023-11-17"
     assert _get_extraction_date(["filename_2023-11-17"]) == ["2023-11-17"]
+
+
+def test_write_parquet_staged_blocks(in_memory_controller):
+    df = pd.DataFrame({"id": range(5000), "name": [f"name_{i}" for i in range(5000)]})
+    in_memory_controller.write_parquet("directory", [df, df.head(10)], ["big", "small"])
+    container = in_memory_controller.container_client
+    assert len(container.blocks["directory/big.parquet"]) > 1
+    for name, expected in [("big", df), ("small", df.head(10))]:
+        blob = container.blobs[f"directory/{name}.parquet"]
+        parquet_file = pq.ParquetFile(BytesIO(blob))
+        assert parquet_file.num_row_groups == -(-len(expected) // 500)
+        pd.testing.assert_frame_equal(parquet_file.read().to_pandas(), expected)
+
+
+def test_partitioned_parquet(in_memory_controller):
+    df = pd.DataFrame(
+        {
+            "state": ["CDMX", "Jalisco", "CDMX", None],
+            "year": [2023, 2023, 2024, 2024],
+            "amount": [1.5, 2.5, 3.5, 4.5],
+        }
+    )
+    blob_names = in_memory_controller.write_partitioned_parquet(
+        "dataset", df, ["state", "year"], compression="snappy"
+    )
+    assert "dataset/state=CDMX/year=2024/part-0.parquet" in blob_names
+    assert "dataset/state=__HIVE_DEFAULT_PARTITION__/year=2024/part-0.parquet" in blob_names
+
+    result = in_memory_controller.read_partitioned_parquet(
+        "dataset", filters=[("state", "=", "CDMX"), ("year", ">=", 2024)]
+    )
+    assert result["amount"].to_list() == [3.5]
+    assert result["state"].to_list() == ["CDMX"]
+    assert result["year"].to_list() == [2024]
+
+    result = in_memory_controller.read_partitioned_parquet(
+        "dataset",
+        columns=["year", "amount"],
+        partition_schema=pa.schema([("year", pa.string())]),
+    )
+    assert result.columns.to_list() == ["year", "amount"]
+    assert sorted(result["year"].to_list()) == ["2023", "2023", "2024", "2024"]
+    assert tools.match_partition({"active": "False"}, [("active", "=", False)])
+    assert not tools.match_partition({"active": "False"}, [("active", "=", True)])
+
+    result = in_memory_controller.read_partitioned_parquet(
+        "dataset", filters=[("amount", "<", 3.0)], columns=["amount"]
+    )
+    assert sorted(result["amount"].to_list()) == [1.5, 2.5]
+
+    import datetime
+
+    df["day"] = ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-01"]
+    in_memory_controller.write_partitioned_parquet("daily", df, ["day"])
+    for value in [datetime.date(2024, 1, 31), pd.Timestamp("2024-01-31")]:
+        result = in_memory_controller.read_partitioned_parquet(
+            "daily", filters=[("day", ">=", value)], columns=["amount"]
+        )
+        assert sorted(result["amount"].to_list()) == [2.5, 3.5, 4.5]
+    assert not tools.match_partition({"day": "latest"}, [("day", "=", datetime.date.today())])
+
+
+def test_get_changed_blobs(in_memory_controller, tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    df = pd.DataFrame({"id": [1, 2, 3]})
+    in_memory_controller.write_parquet("directory", [df, df], ["first", "second"])
+    in_memory_controller.write_parquet("directory/nested", [df], ["third"])
+
+    changed = in_memory_controller.get_changed_blobs("directory", manifest_path, commit=True)
+    assert [blob.name for blob in changed] == [
+        "directory/first.parquet",
+        "directory/second.parquet",
+    ]
+    assert in_memory_controller.get_changed_blobs("directory", manifest_path) == []
+
+    in_memory_controller.write_parquet("directory", [df.head(1)], ["second"])
+    changed = in_memory_controller.get_changed_blobs("directory", manifest_path)
+    assert [blob.name for blob in changed] == ["directory/second.parquet"]
+    # Not committed, the change is returned again
+    assert len(in_memory_controller.get_changed_blobs("directory", manifest_path)) == 1
+    nested = in_memory_controller.get_changed_blobs("directory/nested", manifest_path)
+    assert len(nested) == 1
+
+    in_memory_controller.commit_manifest()
+    assert in_memory_controller.get_changed_blobs("directory", manifest_path) == []
+    assert in_memory_controller.get_changed_blobs("directory/nested", manifest_path) == []
+
+
+def test_async_storage_controller(async_controller):
+    import asyncio
+
+    df = pd.DataFrame({"id": range(10), "name": [f"name_{i}" for i in range(10)]})
+
+    async def run():
+        async with async_controller as controller:
+            await controller.upload_parquet("directory", [df, df.head(3)], ["first", "second"])
+            await controller.upload_parquet("directory/nested", [df], ["third"])
+            names = await controller.get_blob_list("directory")
+            frames = await controller.get_parquet("directory", r"\.parquet")
+        return names, frames
+
+    names, (dfs, df_names) = asyncio.run(run())
+    assert names == ["directory/first.parquet.gz", "directory/second.parquet.gz"]
+    assert [len(frame) for frame in dfs] == [10, 3]
+    pd.testing.assert_frame_equal(dfs[0], df)
+    assert async_controller._blob_service_client.closed
+
+
+@pytest.mark.skipif(importlib.util.find_spec("aiohttp") is not None, reason="aiohttp is installed")
+def test_async_storage_controller_requires_aiohttp():
+    from pydbsmgr.utils.azure_sdk import AsyncStorageController
+
+    connection_string = (
+        "DefaultEndpointsProtocol=https;AccountName=account;AccountKey=YQ==;"
+        "EndpointSuffix=core.windows.net"
+    )
+    with pytest.raises(ImportError, match="pydbsmgr\\[async\\]"):
+        AsyncStorageController(connection_string, "container")
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "auto"])
+def test_read_excel_sheets(tmp_path, monkeypatch, engine):
+    monkeypatch.setattr(tools, "EXCEL_PARALLEL_MIN_BYTES", 0)
+    path = str(tmp_path / "workbook.xlsx")
+    frames = {
+        f"sheet_{i}": pd.DataFrame({"id": range(i + 1), "name": ["a"] * (i + 1)}) for i in range(3)
+    }
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, df in frames.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    for source in [path, (tmp_path / "workbook.xlsx").read_bytes()]:
+        sheets = tools.read_excel_sheets(source, engine=engine, max_workers=2)
+        assert list(sheets) == list(frames)
+        for sheet_name, df in frames.items():
+            pd.testing.assert_frame_equal(sheets[sheet_name], df)
+
+    # Worker processes are opt-in, also when the blobs of a controller are parsed
+    def no_processes(*args, **kwargs):
+        raise AssertionError("no worker process expected")
+
+    monkeypatch.setattr(tools.concurrent.futures, "ProcessPoolExecutor", no_processes)
+    assert list(tools.read_excel_sheets(path, engine=engine)) == list(frames)
+    azure_sdk = pytest.importorskip("pydbsmgr.utils.azure_sdk")
+    blob_data = (tmp_path / "workbook.xlsx").read_bytes()
+    assert len(azure_sdk.parse_blob("dir/workbook.xlsx", blob_data, "excel_csv")) == 3
+
+
+def test_profile_frame(health):
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 3],
+            "name": ["a", None, "b", None],
+            "Unnamed: 2": [None] * 4,
+            "date": pd.to_datetime(["2021-01-01", None, "2021-03-01", "2021-02-01"]),
+        }
+    )
+    info_df = health.profile_frame(df, "table", extended=True)
+    assert info_df["column name"].to_list() == ["id", "name", "date"]
+    assert info_df["# missing rows"].to_list() == [0, 2, 1]
+    assert info_df["# missing rows (percentage)"].to_list() == [0.0, 0.5, 0.25]
+    assert info_df["unique values"].to_list() == [
+        len(df[col].unique()) for col in info_df["column name"]
+    ]
+    assert info_df["min value"].to_list()[0] == 1
+    assert info_df["max value"].to_list()[2] == pd.Timestamp("2021-03-01")
+
+
+def test_frame_sketch_merge():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(60_000),
+            "value": rng.normal(size=60_000),
+            "state": rng.choice(["CDMX", "Jalisco", None], size=60_000),
+        }
+    )
+    sketch = FrameSketch.from_frame(df.iloc[:20_000], chunk_size=7_000)
+    sketch.merge(FrameSketch.from_frame(df.iloc[20_000:]))
+    summary = sketch.summary().set_index("column")
+
+    assert summary.loc["state", "missing"] == df["state"].isna().sum()
+    assert summary.loc["state", "unique"] == 3
+    assert abs(summary.loc["id", "unique"] - 60_000) / 60_000 < 0.03
+    assert summary.loc["id", "max"] == 59_999
+    assert abs(summary.loc["value", "q0.5"] - df["value"].median()) < 0.05
+
+
+def test_missingness_matrix(health):
+    df = pd.DataFrame({"a": [1, None, 3, None, 5, 6], "b": [None] * 3 + ["x"] * 3})
+    matrix = health.missingness_matrix(df, bins=3)
+    np.testing.assert_allclose(matrix, [[0.5, 1.0], [0.5, 0.5], [0.0, 0.0]])
+    assert health.missingness_matrix(df, bins=100).shape == (6, 2)
+
+
+def test_frame_check_fix_parallel(health):
+    def frames():
+        return [
+            pd.DataFrame(
+                {
+                    "First Name": ["ana", "luis", "nan"],
+                    "Empty": [None, None, None],
+                    "Amount ($)": ["1.5", "2", "3"],
+                }
+            )
+            for _ in range(2)
+        ]
+
+    sequential = health.FrameCheck(frames(), ["a", "b"])
+    sequential.fix()
+    for n_jobs, shard_columns in [(2, False), (2, True)]:
+        parallel = health.FrameCheck(frames(), ["a", "b"])
+        parallel.fix(n_jobs=n_jobs, shard_columns=shard_columns)
+        for expected, result in zip(sequential.get_frames(), parallel.get_frames()):
+            pd.testing.assert_frame_equal(expected, result)
+    assert sequential.get_frames()[0].columns.to_list() == ["first_name", "amount"]
+
+
+def test_drop_empty_columns(_drop_empty_columns):
+    df = pd.DataFrame({"a": [1, None], "b": [None, None], "c": ["x", "y"]})
+    assert _drop_empty_columns(df).columns.to_list() == ["a", "c"]
+    assert _drop_empty_columns(df[["a", "c"]]).columns.to_list() == ["a", "c"]
+
+
+def test_intersection_cols(_intersection_cols):
+    dfs = [
+        pd.DataFrame(columns=["c", "a", "b", "d"]),
+        pd.DataFrame(columns=["a", "b", "c"]),
+        pd.DataFrame(columns=["b", "c", "a", "e"]),
+    ]
+    assert [df.columns.to_list() for df in _intersection_cols(dfs)] == [["c", "a", "b"]] * 3
+
+
+def test_concat_frames():
+    dfs = [
+        pd.DataFrame({"id": [1, 2], "code": ["a", "b"], "amount": [1.5, 2.5]}),
+        pd.DataFrame({"id": [3], "code": [4]}),
+        pd.DataFrame({"id": [4.5], "code": [None], "amount": [None]}),
+    ]
+    df = tools.concat_frames(iter(dfs))
+    pd.testing.assert_frame_equal(df, pd.concat(dfs, ignore_index=True))
+    assert df["code"].to_list() == ["a", "b", 4, None]
+    assert tools.merge_by_coincidence(dfs[0], dfs[1], tol=0.5).columns.to_list() == ["id", "code"]
+
+    cases = [
+        [pd.DataFrame({"x": pd.array([1, None], dtype="Int64")}), pd.DataFrame({"x": [2.5]})],
+        [pd.DataFrame({"x": [1, "a"]}), pd.DataFrame({"x": ["b", None]})],
+        [pd.DataFrame({0: [1], 1: ["a"]}), pd.DataFrame({0: [2], 1: ["b"]})],
+        [pd.DataFrame({"x": ["a", "b"], "y": [1, 2]})] * 3,
+    ]
+    for dfs in cases:
+        expected = pd.concat(dfs, ignore_index=True)
+        pd.testing.assert_frame_equal(tools.concat_frames(iter(dfs)), expected)
+
+    # The indexes are kept on request, also when they differ between the dataframes
+    cases = [
+        [pd.DataFrame({"x": [1, 2]}, index=[10, 11]), pd.DataFrame({"x": [3]}, index=[12])],
+        [pd.DataFrame({"x": ["a"]}), pd.DataFrame({"x": ["b"]}).rename_axis("key")],
+        [pd.DataFrame({"x": [1]}, index=["a"]), pd.DataFrame({"x": [2]}, index=[1])],
+    ]
+    for dfs in cases:
+        expected = pd.concat(dfs)
+        pd.testing.assert_frame_equal(tools.concat_frames(iter(dfs), ignore_index=False), expected)
+
+    table = tools.table_from_frame(pd.DataFrame({"mixed": [1, "a"], "text": ["a", None]}))
+    assert table.column("mixed").to_pylist() == ["1", "a"]
+    assert table.column("text").to_pylist() == ["a", None]
+
+
+def test_normalize_columns_cache(_clean_transform):
+    columns = ["First Name", "Amount ($)", "2nd Value"]
+    assert _clean_transform(columns) == ["First_Name", "Amount", "Nd_Value"]
+    hits = normalize_columns.cache_info().hits
+    assert _clean_transform(columns) == ["First_Name", "Amount", "Nd_Value"]
+    assert normalize_columns.cache_info().hits == hits + 1
+
+    df = pd.DataFrame(columns=["Raw Data!", "First.Data", "a__b_"])
+    assert tools.ColumnsCheck(df).get_column_mapping() == {
+        "Raw Data!": "[raw_data]",
+        "First.Data": "[firstdata]",
+        "a__b_": "[a_b]",
+    }
+
+
+def test_preprocess_dataframe_shares_data():
+    fast_upload = pytest.importorskip("pydbsmgr.fast_upload", exc_type=ImportError)
+    df = pd.DataFrame(
+        {
+            "Name": ["x", " ", "<NA>", None],
+            "Amount": [1.0, np.nan, 3.0, 4.0],
+            "Date": pd.to_datetime(["2020-01-01", None, "2020-01-02", "2020-01-03"]),
+        }
+    )
+    uploader = fast_upload.DataFrameToSQL.__new__(fast_upload.DataFrameToSQL)
+    result = uploader._preprocess_dataframe(df)
+    assert result.columns.to_list() == ["[name]", "[amount]", "[date]"]
+    assert df["Name"].to_list()[1:3] == [" ", "<NA>"]
+    assert np.shares_memory(result["[amount]"].to_numpy(), df["Amount"].to_numpy())
+    assert uploader._prepare_data_for_insertion(result)[1] == [None, None, None]
+
+    df = pd.DataFrame(
+        {
+            "Text": pd.array(["x", " ", "<NA>", None], dtype="string[pyarrow]"),
+            "Group": pd.Categorical(["x", " ", "<NA>", None]),
+        }
+    )
+    result = uploader._preprocess_dataframe(df)
+    assert result["[text]"].to_list() == ["x", None, None, None]
+    assert result["[group]"].to_list() == ["x", None, None, None]
+    assert uploader._prepare_data_for_insertion(result)[1:] == [[None, None]] * 3
+
+
+def test_frame_to_rows():
+    df = pd.DataFrame({"date": pd.to_datetime(["2020-01-01", None])})
+    assert tools.frame_to_rows(df) == [[pd.Timestamp("2020-01-01")], [None]]
+
+    df = pd.DataFrame(
+        {
+            "a": np.array([1, 2], dtype="uint8"),
+            "b": pd.array([1, None], dtype="Int64"),
+            "c": [1.5, np.nan],
+            "d": pd.array(["x", None], dtype="string[pyarrow]"),
+        }
+    )
+    rows = tools.frame_to_rows(df)
+    assert rows == [[1, 1, 1.5, "x"], [2, None, None, None]]
+    assert [type(value) for value in rows[0]] == [int, int, float, str]
+
+    columns_check = tools.ColumnsCheck(df)
+    assert not np.shares_memory(columns_check.get_frame()["[a]"].to_numpy(), df["a"].to_numpy())
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_buffered_event_logger(tmp_path, background):
+    logger = EventLogger(
+        "events", str(tmp_path), buffered=True, flush_interval=60, background=background
+    )
+    with logger:
+        for i in range(100):
+            logger.writer("event", str(i))
+        logger.flush()
+        assert len((tmp_path / "events.txt").read_text().splitlines()) == 100
+        logger.writer("last")
+    lines = (tmp_path / "events.txt").read_text().splitlines()
+    assert len(lines) == 101 and lines[-1].endswith("last")
+
+    # Lines written after closing go straight to the file, flushing does not block
+    logger.writer("after close")
+    logger.flush()
+    assert (tmp_path / "events.txt").read_text().splitlines()[-1].endswith("after close")
+
+    reference = weakref.ref(logger)
+    del logger
+    gc.collect()
+    assert reference() is None
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_event_logger_writes_during_close(tmp_path, background):
+    import threading
+
+    logger = EventLogger(
+        "events", str(tmp_path), buffered=True, background=background, verbose=False
+    )
+    started = threading.Barrier(5)
+
+    def write(thread):
+        started.wait()
+        for i in range(200):
+            logger.writer("thread", str(thread), str(i))
+
+    threads = [threading.Thread(target=write, args=(thread,)) for thread in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    logger.close()
+    for thread in threads:
+        thread.join()
+    logger.writer("after close")
+    lines = (tmp_path / "events.txt").read_text().splitlines()
+    assert len(lines) == 801 and lines[-1].endswith("after close")
+
+    if background:
+        # `close` starts between the check of a write and its queueing
+        logger = EventLogger("late", str(tmp_path), buffered=True, background=True, verbose=False)
+        put = logger._queue.put
+        closing = threading.Thread(target=logger.close)
+
+        def put_during_close(line):
+            if line is not None:
+                closing.start()
+                closing.join(timeout=0.2)
+            put(line)
+
+        logger._queue.put = put_during_close
+        logger.writer("late")
+        closing.join()
+        assert (tmp_path / "late.txt").read_text().splitlines()[0].endswith("late")
+
+
+@pytest.mark.parametrize("backend", ["csv", "parquet", "arrow"])
+def test_logbook_append(tmp_path, backend):
+    logbook = EventLogBook("logbook", str(tmp_path), backend=backend)
+    logbook.create(pd.DataFrame({"Column1": [1, 2], "Column2": ["A", "B"]}))
+    logbook.update([[3, "C"]])
+    logbook.update([[4, "D"], [5, "E"]])
+    with pytest.raises(ValueError):
+        logbook.update([[6]])
+    logbook.compact()
+    df = logbook.read()
+    assert df["Column1"].to_list() == [1, 2, 3, 4, 5]
+    assert df["Column2"].to_list() == ["A", "B", "C", "D", "E"]
+    with pytest.raises(ValueError):
+        logbook.update(pd.DataFrame({"Column2": ["F"], "Column1": [6]}))
+    logbook.update(pd.DataFrame({"Column1": [6], "Column2": ["F"]}))
+    assert logbook.read()["Column1"].to_list() == [1, 2, 3, 4, 5, 6]
+    if backend == "csv":
+        return
+    logbook.compact()
+    assert len(os.listdir(logbook.full_path)) == 1
+
+
+@pytest.mark.parametrize("backend", ["parquet", "arrow"])
+def test_logbook_compact_crash(tmp_path, backend, monkeypatch):
+    logbook = EventLogBook("logbook", str(tmp_path), backend=backend)
+    logbook.create(pd.DataFrame({"Column1": [1], "Column2": ["A"]}))
+    os.rename(logbook._parts()[0], logbook._part_path(99999))
+    logbook.update([[2, "B"]])
+    assert os.path.basename(logbook._parts()[-1]).startswith("part-100000.")
+
+    # The merged part is in place but the old parts could not be deleted
+    def crash(path):
+        raise OSError("crash")
+
+    monkeypatch.setattr(os, "remove", crash)
+    with pytest.raises(OSError):
+        logbook.compact()
+    assert logbook.read()["Column1"].to_list() == [1, 2]
+    monkeypatch.undo()
+
+    logbook.update([[3, "C"]])
+    logbook.compact()
+    assert logbook.read()["Column1"].to_list() == [1, 2, 3]
+    assert len(os.listdir(logbook.full_path)) == 1
+
+
+def test_import_is_lazy():
+    script = (
+        "import sys, pydbsmgr; "
+        "print(sorted(m for m in ('azure', 'IPython', 'psutil', 'yaml') if m in sys.modules)); "
+        "pydbsmgr.StorageController; print('azure' in sys.modules)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    ).stdout
+    assert output.split() == ["[]", "True"]
+
+
+def test_benchmark_suite(tmp_path, monkeypatch):
+    from benchmarks.run import main
+
+    baseline = str(tmp_path / "baseline.json")
+    assert main(["--repeat", "1", "--cases", "clean", "check_dtypes", "--save", baseline]) == 0
+    assert (
+        main(["--repeat", "1", "--cases", "clean", "--compare", baseline, "--tolerance", "100"])
+        == 0
+    )
+
+    from benchmarks import run
+
+    results = json.loads(open(baseline).read())
+    results["results"]["removed case"] = results["results"]["clean"]
+    with open(baseline, "w") as file:
+        json.dump(results, file)
+    compare = ["--repeat", "1", "--cases", "clean", "--compare", baseline, "--tolerance", "100"]
+    assert main(compare) == 1
+
+    def broken(df):
+        return lambda: 1 / 0
+
+    del results["results"]["removed case"]
+    with open(baseline, "w") as file:
+        json.dump(results, file)
+    monkeypatch.setitem(run.CASES, "clean", broken)
+    assert main(compare) == 1
+
+
+def test_instrumentation_spans(tmp_path):
+    from pydbsmgr.utils.instrumentation import Instrumentation
+
+    recorder = Instrumentation(enabled=True, sample_interval=0.001)
+
+    @recorder.instrument("outer")
+    def outer(n):
+        with recorder.span("inner", rows=n) as span:
+            span.add(bytes=8 * n)
+        return n
+
+    assert [outer(10), outer(5)] == [10, 5]
+    summary = {row["name"]: row for row in recorder.summary()}
+    assert summary["outer"]["calls"] == 2
+    assert (summary["inner"]["rows"], summary["inner"]["bytes"]) == (15, 120)
+    assert summary["inner"]["peak_rss_mb"] > 0
+    assert recorder.spans[0].parent == "outer"
+    recorder.export(str(tmp_path / "spans.json"))
+    recorder.export(str(tmp_path / "spans.csv"))
+    assert pd.read_csv(tmp_path / "spans.csv")["name"].to_list() == ["inner", "outer"]
+
+    recorder.enabled = False
+    recorder.reset()
+    assert outer(1) == 1 and recorder.spans == []
+
+
+@pytest.mark.parametrize("mode, extension", [("cprofile", ".pstats"), ("sampling", ".collapsed")])
+def test_profiling(tmp_path, mode, extension):
+    import pstats
+
+    from pydbsmgr.lightest import LightCleaner
+    from pydbsmgr.utils.profiling import profiling
+
+    # Long enough for the sampling thread to get the GIL several times
+    df = pd.DataFrame({"name": ["#Jo$hn", "alice!"] * 10_000, "value": range(20_000)})
+    with profiling(mode, output_dir=str(tmp_path), interval=0.0005) as paths:
+        LightCleaner(df).clean_frame(sample_frac=1.0)
+    LightCleaner(df).clean_frame(sample_frac=1.0)
+    assert len(paths) == 1 and paths[0].endswith(extension)
+    assert os.path.basename(paths[0]).startswith("LightCleaner.clean_frame-")
+    if mode == "cprofile":
+        assert any(name == "clean" for _, _, name in pstats.Stats(paths[0]).stats)
+    else:
+        stacks = open(paths[0]).read().splitlines()
+        assert stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+    # Runs in the same second get their own file
+    with profiling(mode, output_dir=str(tmp_path)) as paths:
+        for _ in range(3):
+            LightCleaner(df.head(10)).clean_frame(sample_frac=1.0)
+    assert len(set(paths)) == 3 and all(os.path.isfile(path) for path in paths)
+
+
+def test_categorical_cleaning():
+    from pydbsmgr.lightest import LightCleaner
+    from pydbsmgr.main import check_dtypes
+
+    df = pd.DataFrame(
+        {
+            "state": ["#Texas", "new york!", "Texas", "ohio"] * 250,
+            "code": ["a-1", "B 2", "a-1", "c.3"] * 250,
+            "value": np.arange(1000),
+        }
+    )
+    expected = check_dtypes(df.copy(), df.dtypes)
+    result = check_dtypes(df.copy(), df.dtypes, categorical=True)
+    assert isinstance(result["state"].dtype, pd.CategoricalDtype)
+    assert result["state"].cat.categories.to_list() == ["Texas", "New York", "ohio"]
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+    expected = LightCleaner(df).clean_frame(sample_frac=1.0, fast_execution=False)
+    result = LightCleaner(df).clean_frame(sample_frac=1.0, fast_execution=False, categorical=True)
+    assert isinstance(result["code"].dtype, pd.CategoricalDtype)
+    assert result["state"].cat.categories.to_list() == ["Texas", "New York", "Ohio"]
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+def test_downcast_frame():
+    df = pd.DataFrame(
+        {
+            "small": np.arange(100),
+            "wide": np.arange(100) * 100_000 - 5,
+            "whole": [1.0, np.nan] * 50,
+            "half": [0.5, 0.25] * 50,
+            "precise": np.linspace(0, 1, 100),
+            "nullable": pd.array([1.5, None] * 50, dtype="Float64"),
+            "state": ["TX", "NY"] * 50,
+            "id": [f"id-{i}" for i in range(100)],
+        }
+    )
+    result, report = tools.downcast_frame(df)
+    assert result.dtypes.astype(str).to_list() == [
+        "uint8",
+        "int32",
+        "float32",
+        "float32",
+        "float64",
+        "Float32",
+        "category",
+        "string",
+    ]
+    assert report["new memory"].sum() < report["memory"].sum()
+    for col in ["small", "wide", "whole", "half", "precise", "nullable"]:
+        np.testing.assert_array_equal(
+            result[col].to_numpy(float, na_value=np.nan), df[col].to_numpy(float, na_value=np.nan)
+        )
+    assert result["nullable"].isna().sum() == 50
+    assert result[["state", "id"]].astype(object).equals(df[["state", "id"]])
+
+    # A later chunk with decimals still fits the floats of the first one
+    follow_up = pd.Series([0.5, np.nan, 2.25])
+    chunks = pd.concat([result["whole"], tools.downcast_series(follow_up)], ignore_index=True)
+    assert chunks.dtype == np.float32
+    assert chunks.iloc[-3:].to_list()[::2] == [0.5, 2.25]
+
+    whole = tools.downcast_series(df["whole"], whole_floats_to_int=True)
+    assert whole.dtype == "UInt8" and whole.isna().sum() == 50
+
+
+def test_infer_schema_downcasted():
+    fast_upload = pytest.importorskip("pydbsmgr.fast_upload", exc_type=ImportError)
+    uploader = fast_upload.DataFrameToSQL.__new__(fast_upload.DataFrameToSQL)
+    df = pd.DataFrame(
+        {
+            "a": np.array([1], dtype="uint8"),
+            "b": np.array([1], dtype="int8"),
+            "c": pd.array([None], dtype="Int32"),
+            "d": np.array([1.5], dtype="float32"),
+            "e": pd.array(["x"], dtype="string[pyarrow]"),
+            "f": pd.array([2**64 - 1], dtype="UInt64"),
+        }
+    )
+    types = [uploader._infer_schema(col, df, 10, True) for col in df.columns]
+    assert types == ["TINYINT", "SMALLINT", "INT", "REAL", "VARCHAR(10)", "DECIMAL(20,0)"]
+    assert uploader._prepare_data_for_insertion(df) == [[1, 1, None, 1.5, "x", 2**64 - 1]]
+
+
+def test_streaming_frame_check(health, tmp_path):
+    df = pd.DataFrame(
+        {
+            "Name": ["#Jo$hn", "alice!", "Bob", None] * 25,
+            "Amount": np.arange(100, dtype=float),
+            "Empty": [np.nan] * 100,
+        }
+    )
+    df.to_csv(tmp_path / "input.csv", index=False)
+    check = health.StreamingFrameCheck(str(tmp_path / "input.csv"), "input", chunk_size=30)
+    check.fix(output_path=str(tmp_path / "output.parquet"))
+    check.generate_report(str(tmp_path / "report.html"), str(tmp_path / "output.yaml"))
+
+    table = pq.read_table(tmp_path / "output.parquet")
+    assert table.num_rows == 100 and table.column_names == ["name", "amount"]
+    assert pq.ParquetFile(tmp_path / "output.parquet").num_row_groups == 4
+    assert table.column("amount").to_pylist() == list(range(100))
+    assert check.df_files_info["# rows"].to_list() == ["100", "100"]
+    assert check.df_files_info["unique values"].to_list() == ["4", "100"]
+
+    chunks = (df.iloc[i : i + 40] for i in range(0, 100, 40))
+    check = health.StreamingFrameCheck(chunks, "chunks")
+    check.fix(drop_empty_cols=False, output_path=str(tmp_path / "output.csv"))
+    assert pd.read_csv(tmp_path / "output.csv").shape == (100, 3)
+
+
+def test_streaming_frame_check_widens_dtypes(health, tmp_path):
+    messages = []
+    sink = health.logger.add(messages.append, format="{message}")
+    chunks = [
+        pd.DataFrame({"id": [1, 2], "amount": [1, 2]}),
+        pd.DataFrame({"id": [3, None], "amount": [3.5, None]}),
+    ]
+    try:
+        check = health.StreamingFrameCheck(iter(chunks), "chunks")
+        check.fix(output_path=str(tmp_path / "output.parquet"), dtypes={"amount": "float64"})
+    finally:
+        health.logger.remove(sink)
+
+    table = pq.read_table(tmp_path / "output.parquet")
+    assert table.column("id").to_pylist() == [1, 2, 3, None]
+    assert table.column("amount").to_pylist() == [1.0, 2.0, 3.5, None]
+    assert {col: sketch.dtype for col, sketch in check.sketch.columns.items()} == {
+        "id": "Int64",
+        "amount": "float64",
+    }
+    assert not any("missing values" in message for message in messages)
+
+    check = health.StreamingFrameCheck(iter(chunks), "chunks")
+    with pytest.raises(ValueError, match="amount"):
+        check.fix(output_path=str(tmp_path / "failed.parquet"))
+
+
+def test_drop_duplicate_columns():
+    df = pd.DataFrame(
+        {
+            "a": [1, 2, 3],
+            "b": [1, 2, 3],
+            "c": [1.0, 2.0, 3.0],
+            "d": [[1], [2], [3]],
+            "e": [[1], [2], [3]],
+            "f": ["x", None, "z"],
+            "g": ["x", None, "z"],
+        }
+    )
+    assert tools.duplicated_columns(df).tolist() == [False, True, False, False, True, False, True]
+    assert tools.drop_duplicate_columns(df).columns.to_list() == ["a", "c", "d", "f"]
+    assert tools.drop_duplicate_columns(df[["a", "c"]]).columns.to_list() == ["a", "c"]
+
+
+def test_drop_duplicate_rows(monkeypatch, health):
+    import polars as pl
+
+    from pydbsmgr.lightest import LightCleaner
+
+    df = pd.DataFrame(
+        {
+            "a": [1, 2, 1, None, None],
+            "b": ["x", "y", "x", None, None],
+            "c": [[1], [2], [1], [3], [4]],
+        },
+        index=[10, 11, 12, 13, 14],
+    )
+    assert tools.duplicated_rows(df).tolist() == [False, False, True, False, False]
+    assert tools.duplicated_rows(df, ["a", "b"]).tolist() == df.duplicated(["a", "b"]).tolist()
+    assert tools.duplicated_rows(df, ["a", "b"], keep="last").tolist() == [
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert tools.drop_duplicate_rows(df).index.to_list() == [10, 11, 13, 14]
+
+    table = pl.DataFrame({"a": [1, 2, 1], "b": ["x", "y", "x"], "c": [1, 2, 1]})
+    assert tools.drop_duplicate_rows(table).to_dict(as_series=False) == {
+        "a": [1, 2],
+        "b": ["x", "y"],
+        "c": [1, 2],
+    }
+    assert tools.drop_duplicate_columns(table).columns == ["a", "b"]
+
+    check = health.FrameCheck(df[["a", "b"]].assign(d=df["a"]))
+    check.fix(drop_duplicates=True)
+    assert check.get_frames()[0].shape == (3, 2)
+
+    # Rows that only become equal once cleaned are duplicates too
+    check = health.FrameCheck(pd.DataFrame({"name": ["ABC ", "Abc", "xyz"], "n": [1, 1, 2]}))
+    check.fix(drop_duplicates=True)
+    assert check.get_frames()[0].shape == (2, 2)
+
+    cleaned = LightCleaner(pd.DataFrame({"a": ["x ", "y", "x"], "b": ["x", "y", "x"]}))
+    assert cleaned.clean_frame(drop_duplicates=True).shape == (2, 1)
+
+    # Every row gets the same hash, only the rows that are really equal are dropped
+    monkeypatch.setattr(tools, "_hash_rows", lambda df: np.zeros(len(df), dtype=np.uint64))
+    assert tools.duplicated_rows(df).tolist() == [False, False, True, False, False]
+
+
+def test_consolidate_workbooks(tmp_path):
+    from pydbsmgr.consolidate import consolidate_workbooks
+
+    (tmp_path / "input" / "nested").mkdir(parents=True)
+    df = pd.DataFrame({"a": [1, 2], "b": [1, 2], "c": ["x", "y"]})
+    for name in ["first.xlsx", "nested/second.xlsx"]:
+        with pd.ExcelWriter(tmp_path / "input" / name) as writer:
+            df.to_excel(writer, sheet_name="one", index=False)
+            df[["c"]].to_excel(writer, sheet_name="two", index=False)
+    (tmp_path / "input" / "broken.xlsx").write_bytes(b"not a workbook")
+
+    output_dir = tmp_path / "output"
+    index = consolidate_workbooks(str(tmp_path / "input"), str(output_dir), max_workers=2)
+    assert index.equals(pd.read_parquet(output_dir / "index.parquet"))
+    names = ["broken", "first", "first", "nested/second", "nested/second"]
+    assert index["name_xls"].to_list() == names
+    assert index["error"].notna().to_list() == [True, False, False, False, False]
+    assert index["duplicate columns"].dropna().to_list() == [1, 0, 1, 0]
+    sheet = pd.read_parquet(output_dir / f"{index['rpt_name'][1]}.parquet")
+    assert sheet.columns.to_list() == ["a", "c"]